@@ -0,0 +1,145 @@
+# Micro-benchmark of presence decoding over the hand-written presence fixtures (tests/data/presence_payloads.json)
+#
+# Times the previous dir()-based decoder (kept below as the reference) against the current
+# xbox_process_presence_class() on the same PresenceItem objects, then the python-xbox model path (validation of
+# PresenceItem + xbox_process_presence_class()) against the raw JSON fast path (json_loads() +
+# xbox_process_presence_json(), PRESENCE_FAST_PATH)
+#
+# Usage: python tests/bench_presence_decode.py [--batch 1100] [--repeat 5]
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import xbox_monitor  # noqa: E402
+from pythonxbox.api.provider.presence.models import PresenceItem  # noqa: E402
+from xbox_monitor import convert_iso_str_to_datetime, debug_print, get_debug_date_from_ts, xbox_get_platform_mapping  # noqa: E402
+
+PAYLOADS_FILE = Path(__file__).parent / "data" / "presence_payloads.json"
+
+
+# Previous presence decoder (before direct attribute access), kept as the benchmark reference
+def xbox_process_presence_class_dir(presence, platform_short=True):
+    status = ""
+    title_name = ""
+    game_name = ""
+    platform = ""
+    lastonline_ts = 0
+
+    if 'state' in dir(presence):
+        if presence.state:
+            status = str(presence.state).lower()
+
+    last_seen_class = ""
+    last_seen_raw_title = ""
+    last_seen_raw_ts = ""
+    last_seen_raw_device = ""
+    presence_titles_dbg = []
+
+    if 'last_seen' in dir(presence):
+        if presence.last_seen:
+            last_seen_class = presence.last_seen
+            last_seen_raw_title = getattr(last_seen_class, "title_name", "")
+            last_seen_raw_ts = getattr(last_seen_class, "timestamp", "")
+            last_seen_raw_device = getattr(last_seen_class, "device_type", "")
+            if 'title_name' in dir(last_seen_class):
+                if last_seen_class.title_name:
+                    if last_seen_class.title_name not in ("Online", "Home"):
+                        title_name = last_seen_class.title_name
+            if 'device_type' in dir(last_seen_class):
+                if last_seen_class.device_type:
+                    platform = last_seen_class.device_type
+                    platform = xbox_get_platform_mapping(platform, platform_short)
+            if 'timestamp' in dir(last_seen_class):
+                if last_seen_class.timestamp:
+                    lastonline_dt = convert_iso_str_to_datetime(last_seen_class.timestamp)
+                    if lastonline_dt:
+                        lastonline_ts = int(lastonline_dt.timestamp())
+                    else:
+                        lastonline_ts = 0
+        elif 'type' in dir(presence):
+            dev_type = presence.type
+            platform = xbox_get_platform_mapping(dev_type, platform_short)
+
+    if 'devices' in dir(presence):
+        if presence.devices:
+            devices_class = presence.devices
+            try:
+                platform = devices_class[0].type
+                platform = xbox_get_platform_mapping(platform, platform_short)
+            except IndexError:
+                pass
+            if 'titles' in dir(devices_class[0]):
+                titles_class = devices_class[0].titles
+                for title in titles_class:
+                    t_name = getattr(title, "name", "")
+                    t_placement = getattr(title, "placement", "")
+                    if t_name:
+                        presence_titles_dbg.append(f"{t_name} [{t_placement}]")
+                    if title.name not in ("Online", "Home", "Xbox App") and title.placement != "Background":
+                        game_name = title.name
+                        break
+
+    debug_print(f"Presence data: state={status}, title_name={title_name}, game_name={game_name}, platform={platform}, lastonline={get_debug_date_from_ts(lastonline_ts)}")
+    debug_print(f"Presence raw: last_seen_title={last_seen_raw_title}, last_seen_device={last_seen_raw_device}, last_seen_timestamp={last_seen_raw_ts}")
+    if presence_titles_dbg:
+        debug_print(f"Presence device titles: {', '.join(presence_titles_dbg)}")
+    else:
+        debug_print("Presence device titles: none")
+
+    return status, title_name, game_name, platform, lastonline_ts
+
+
+# Returns True if the reference decoder can decode the presence (it fails on devices with "titles": null)
+def decodes_with_reference(presence):
+    try:
+        xbox_process_presence_class_dir(presence)
+        return True
+    except TypeError:
+        return False
+
+
+def run_benchmarks(title, benchmarks, batch_size, repeat):
+    print(title)
+    results = []
+    for name, func in benchmarks:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        results.append(best)
+        print(f"  {name:<44} {best * 1000:8.2f} ms ({best / batch_size * 1e6:.2f} us per presence)")
+    print(f"  speedup: {results[0] / results[1]:.1f}x\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of Xbox presence decoding")
+    parser.add_argument("--batch", type=int, default=1100, help="Number of presences per run (default: 1100, one presence batch request)")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs, the best one is reported (default: 5)")
+    args = parser.parse_args()
+
+    xbox_monitor.LOCAL_TIMEZONE = "UTC"
+    xbox_monitor.DEBUG_MODE = False
+
+    payloads = [case["payload"] for case in json.loads(PAYLOADS_FILE.read_text(encoding="utf-8"))]
+    batch = [payloads[i % len(payloads)] for i in range(args.batch)]
+    body = json.dumps(batch).encode("utf-8")
+    items = [PresenceItem.model_validate(payload) for payload in batch]
+    reference_items = [item for item in items if decodes_with_reference(item)]
+
+    print(f"{len(payloads)} hand-written presence fixtures, {args.batch} presences per run, best of {args.repeat} runs, JSON parser: {'orjson' if xbox_monitor.orjson else 'json'}\n")
+
+    run_benchmarks(f"Decoding of PresenceItem objects ({len(reference_items)} presences the reference decoder can decode):", [
+        ("previous dir()-based decoder", lambda: [xbox_process_presence_class_dir(x) for x in reference_items]),
+        ("xbox_process_presence_class()", lambda: [xbox_monitor.xbox_process_presence_class(x) for x in reference_items]),
+    ], len(reference_items), args.repeat)
+
+    run_benchmarks("Decoding of the presence batch response body:", [
+        ("model path (parse + validate + decode)", lambda: [xbox_monitor.xbox_process_presence_class(PresenceItem.model_validate(x)) for x in json.loads(body)]),
+        ("fast path (parse + decode)", lambda: [xbox_monitor.xbox_process_presence_json(x) for x in xbox_monitor.json_loads(body)]),
+    ], args.batch, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
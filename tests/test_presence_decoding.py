@@ -0,0 +1,53 @@
+# Equivalence tests of the raw JSON presence decoder (PRESENCE_FAST_PATH) against the python-xbox model path
+
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import xbox_monitor  # noqa: E402
+from pythonxbox.api.provider.presence.models import PresenceItem  # noqa: E402
+
+PAYLOADS_FILE = Path(__file__).parent / "data" / "presence_payloads.json"
+PAYLOADS = json.loads(PAYLOADS_FILE.read_text(encoding="utf-8"))
+
+
+@pytest.fixture(autouse=True)
+def local_timezone(monkeypatch):
+    monkeypatch.setattr(xbox_monitor, "LOCAL_TIMEZONE", "Europe/Warsaw")
+
+
+@pytest.mark.parametrize("platform_short", [True, False])
+@pytest.mark.parametrize("case", PAYLOADS, ids=[case["name"] for case in PAYLOADS])
+def test_json_decoder_matches_model_decoder(case, platform_short):
+    # Round trip through bytes, the same way the fast path gets the response body
+    raw = xbox_monitor.json_loads(json.dumps(case["payload"]).encode("utf-8"))
+    presence = PresenceItem.model_validate(case["payload"])
+
+    assert xbox_monitor.xbox_process_presence_json(raw, platform_short) == xbox_monitor.xbox_process_presence_class(presence, platform_short)
+
+
+@pytest.mark.parametrize("case", PAYLOADS, ids=[case["name"] for case in PAYLOADS])
+def test_dispatcher_picks_decoder_by_type(case):
+    raw = case["payload"]
+    presence = PresenceItem.model_validate(raw)
+
+    assert xbox_monitor.xbox_process_presence(raw) == xbox_monitor.xbox_process_presence(presence)
+
+
+def test_json_decoder_matches_model_decoder_in_debug_mode(monkeypatch, capsys):
+    monkeypatch.setattr(xbox_monitor, "DEBUG_MODE", True)
+    raw = next(case["payload"] for case in PAYLOADS if case["name"] == "online_multiple_titles")
+
+    record_json = xbox_monitor.xbox_process_presence_json(raw)
+    output_json = capsys.readouterr().out
+    record_class = xbox_monitor.xbox_process_presence_class(PresenceItem.model_validate(raw))
+    output_class = capsys.readouterr().out
+
+    assert record_json == record_class
+    assert output_json
+    assert re.sub(r"\[DEBUG [0-9:]+\]", "", output_json) == re.sub(r"\[DEBUG [0-9:]+\]", "", output_class)
@@ -0,0 +1,137 @@
+# Tests of the session reconstruction engine (SessionBuilder) and history reports built on it (ActivityReport)
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+import pytz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import xbox_monitor  # noqa: E402
+from xbox_monitor import ActivityReport, SessionBuilder  # noqa: E402
+
+OFFLINE_INTERRUPT = 420
+TIMEZONE = "Europe/Warsaw"
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    monkeypatch.setattr(xbox_monitor, "LOCAL_TIMEZONE", TIMEZONE)
+    monkeypatch.setattr(xbox_monitor, "OFFLINE_INTERRUPT", OFFLINE_INTERRUPT)
+
+
+def local_ts(*args):
+    return int(pytz.timezone(TIMEZONE).localize(datetime(*args)).timestamp())
+
+
+def build(events, finish_ts=None):
+    sessions = []
+    game_sessions = []
+    builder = SessionBuilder(OFFLINE_INTERRUPT, lambda *x: sessions.append(x), lambda *x: game_sessions.append(x))
+    for ts, status, game in events:
+        builder.add(ts, status, game)
+    if finish_ts is not None:
+        builder.finish(finish_ts)
+    return builder, sessions, game_sessions
+
+
+def test_short_offline_gap_is_merged_into_one_session():
+    _, sessions, game_sessions = build([
+        (1000, "online", ""),
+        (1100, "online", "Halo Infinite"),
+        (1700, "offline", ""),
+        (1700 + OFFLINE_INTERRUPT, "online", ""),
+        (3000, "offline", ""),
+    ], finish_ts=9000)
+
+    assert sessions == [(1000, 3000, 1, 600)]
+    assert game_sessions == [("Halo Infinite", 1100, 1700)]
+
+
+def test_long_offline_gap_splits_sessions():
+    _, sessions, _ = build([
+        (1000, "online", "Halo Infinite"),
+        (2000, "offline", ""),
+        (2000 + OFFLINE_INTERRUPT + 1, "away", ""),
+        (3000, "offline", ""),
+    ], finish_ts=9000)
+
+    assert sessions == [(1000, 2000, 1, 1000), (2000 + OFFLINE_INTERRUPT + 1, 3000, 0, 0)]
+
+
+def test_offline_session_emitted_once_interrupt_is_known():
+    _, sessions, _ = build([
+        (1000, "online", ""),
+        (2000, "offline", ""),
+    ])
+
+    # Still unknown if the user gets online again within OFFLINE_INTERRUPT
+    assert sessions == []
+
+
+def test_game_session_durations():
+    _, sessions, game_sessions = build([
+        (1000, "online", "Halo Infinite"),
+        (1300, "online", "Forza Horizon 5"),
+        (1500, "online", ""),
+        (1600, "away", "Halo Infinite"),
+        (2000, "offline", ""),
+    ], finish_ts=9000)
+
+    assert game_sessions == [("Halo Infinite", 1000, 1300), ("Forza Horizon 5", 1300, 1500), ("Halo Infinite", 1600, 2000)]
+    assert sessions == [(1000, 2000, 3, 900)]
+
+
+def test_current_session_live_totals():
+    builder, _, _ = build([
+        (1000, "online", "Halo Infinite"),
+        (1300, "online", ""),
+        (1400, "online", "Forza Horizon 5"),
+    ])
+
+    assert builder.current_session(2000) == (1000, 2, 300 + 600)
+
+    builder.add(2000, "offline", "")
+    assert builder.current_session(2100) is None
+
+    # Short offline interruption continues the previous session and its totals
+    builder.add(2100, "online", "")
+    assert builder.current_session(2200) == (1000, 2, 900)
+
+
+def test_activity_report_clipping_and_daily_split():
+    since_ts = local_ts(2026, 10, 10)
+    until_ts = local_ts(2026, 10, 12)
+    report = ActivityReport(since_ts, until_ts)
+
+    for ts, status, game in [
+        # Started before the range, 1 hour within it
+        (local_ts(2026, 10, 9, 23, 0), "online", "Halo Infinite"),
+        (local_ts(2026, 10, 10, 0, 30), "online", ""),
+        (local_ts(2026, 10, 10, 1, 0), "offline", ""),
+        # Across midnight: 30 minutes on each day
+        (local_ts(2026, 10, 10, 23, 30), "online", "Forza Horizon 5"),
+        (local_ts(2026, 10, 11, 0, 30), "offline", ""),
+        # Ends after the range, 1 hour within it
+        (local_ts(2026, 10, 11, 23, 0), "online", ""),
+        (local_ts(2026, 10, 12, 2, 0), "offline", ""),
+    ]:
+        report.add(ts, status, game)
+    report.finish()
+
+    assert report.sessions == 3
+    assert report.online_time == 3 * 3600
+    assert report.days == {date(2026, 10, 10): 5400, date(2026, 10, 11): 5400}
+    assert report.top_games() == [("Forza Horizon 5", 3600, 1), ("Halo Infinite", 1800, 1)]
+
+
+def test_activity_report_skips_sessions_outside_range():
+    report = ActivityReport(local_ts(2026, 10, 10), local_ts(2026, 10, 11))
+
+    report.add(local_ts(2026, 10, 8, 20, 0), "online", "Halo Infinite")
+    report.add(local_ts(2026, 10, 8, 22, 0), "offline", "")
+    report.finish()
+
+    assert (report.sessions, report.online_time, report.days, report.games) == (0, 0, {}, {})
@@ -0,0 +1,129 @@
+# Transition tests of the per-user monitoring state machine (XboxUserState.apply())
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xbox_monitor import GameChangeEvent, PresenceRecord, StatusChangeEvent, TitleHistoryActivityEvent, XboxUserState  # noqa: E402
+
+OFFLINE_INTERRUPT = 420
+
+
+def presence(status, game_name="", platform="XSX", lastonline_ts=0):
+    return PresenceRecord(status, "", game_name, platform, lastonline_ts)
+
+
+def test_offline_online_offline_session():
+    state = XboxUserState(presence("offline"), 1000, OFFLINE_INTERRUPT)
+
+    events = state.apply(presence("online"), 5000)
+    assert events == [StatusChangeEvent(5000, "offline", "online", 1000, "XSX", "", 5000, 0, 0, 0)]
+    assert state.online_start_ts == 5000
+
+    events = state.apply(presence("online", "Halo Infinite"), 5100)
+    assert events == [GameChangeEvent(5100, "", "Halo Infinite", 0, "XSX")]
+    assert state.games_number == 1
+
+    events = state.apply(presence("offline"), 5700)
+    assert [type(event) for event in events] == [StatusChangeEvent, GameChangeEvent]
+    status_event, game_event = events
+    assert (status_event.status_old, status_event.status, status_event.since_ts) == ("online", "offline", 5000)
+    assert status_event.online_start_ts == 5000
+    assert (status_event.games_number, status_event.game_total_ts) == (1, 600)
+    assert game_event == GameChangeEvent(5700, "Halo Infinite", "", 5100, "XSX")
+    assert state.online_start_ts == 0
+    assert state.status_ts == 5700
+
+
+def test_game_played_until_offline_is_counted_once():
+    state = XboxUserState(presence("online", "Halo Infinite"), 1000, OFFLINE_INTERRUPT, online_start_ts=1000, game_ts=1000)
+    assert state.games_number == 1
+
+    state.apply(presence("offline"), 1900)
+
+    # Counted by the status change, the following "stopped playing" must not add it again
+    assert state.game_total_after_offline_counted
+    assert state.game_total_ts == 900
+
+
+def test_short_offline_interruption_restores_session():
+    state = XboxUserState(presence("online", "Halo Infinite"), 1000, OFFLINE_INTERRUPT, online_start_ts=1000, game_ts=1000)
+    state.apply(presence("offline"), 2000)
+
+    events = state.apply(presence("online"), 2000 + OFFLINE_INTERRUPT - 20)
+    assert events[0].short_offline_ts == 1000
+    assert events[0].online_start_ts == 1000
+    assert state.online_start_ts == 1000
+    assert (state.games_number, state.game_total_ts) == (1, 1000)
+    assert not state.game_total_after_offline_counted
+
+
+def test_long_offline_gap_starts_new_session():
+    state = XboxUserState(presence("online", "Halo Infinite"), 1000, OFFLINE_INTERRUPT, online_start_ts=1000, game_ts=1000)
+    state.apply(presence("offline"), 2000)
+
+    events = state.apply(presence("online"), 2000 + OFFLINE_INTERRUPT + 1)
+    assert events[0].short_offline_ts == 0
+    assert events[0].online_start_ts == 2000 + OFFLINE_INTERRUPT + 1
+    assert (state.games_number, state.game_total_ts) == (0, 0)
+
+
+def test_game_change_while_online():
+    state = XboxUserState(presence("online", "Halo Infinite"), 1000, OFFLINE_INTERRUPT, online_start_ts=1000, game_ts=1000)
+
+    events = state.apply(presence("online", "Forza Horizon 5"), 1300)
+    assert events == [GameChangeEvent(1300, "Halo Infinite", "Forza Horizon 5", 1000, "XSX")]
+    assert (state.games_number, state.game_total_ts) == (2, 300)
+
+    events = state.apply(presence("online"), 1500)
+    assert events == [GameChangeEvent(1500, "Forza Horizon 5", "", 1300, "XSX")]
+    assert (state.games_number, state.game_total_ts) == (2, 500)
+
+
+def test_status_change_between_online_states_keeps_session():
+    state = XboxUserState(presence("online"), 1000, OFFLINE_INTERRUPT, online_start_ts=1000)
+
+    events = state.apply(presence("away"), 1200)
+    assert events == [StatusChangeEvent(1200, "online", "away", 1000, "XSX", "", 0, 0, 0, 0)]
+    assert state.online_start_ts == 1000
+
+
+def test_appear_offline_detected_via_title_history():
+    state = XboxUserState(presence("offline"), 1000, OFFLINE_INTERRUPT, title_history_ts=900, title_history_game="Halo Infinite")
+
+    assert state.apply(presence("offline", lastonline_ts=950), 1100, 900, "Halo Infinite") == []
+
+    events = state.apply(presence("offline", lastonline_ts=950), 1200, 1150, "Forza Horizon 5")
+    assert events == [TitleHistoryActivityEvent(1200, 1150, "Forza Horizon 5")]
+    assert (state.title_history_ts, state.title_history_game) == (1150, "Forza Horizon 5")
+
+    # Older title history entry does not trigger the detection
+    assert state.apply(presence("offline"), 1300, 1100, "Halo Infinite") == []
+
+
+def test_appear_offline_needs_title_history_baseline():
+    state = XboxUserState(presence("offline"), 1000, OFFLINE_INTERRUPT)
+
+    assert state.apply(presence("offline"), 1100, 1050, "Halo Infinite") == []
+
+
+def test_title_history_baseline_synced_when_getting_offline():
+    state = XboxUserState(presence("online", "Halo Infinite"), 1000, OFFLINE_INTERRUPT, online_start_ts=1000, game_ts=1000, title_history_ts=500, title_history_game="Forza Horizon 5")
+
+    events = state.apply(presence("offline"), 2000, 1000, "Halo Infinite")
+    assert not any(isinstance(event, TitleHistoryActivityEvent) for event in events)
+    assert (state.title_history_ts, state.title_history_game) == (1000, "Halo Infinite")
+
+
+def test_unchanged_presence_is_skipped():
+    state = XboxUserState(presence("online", "Halo Infinite"), 1000, OFFLINE_INTERRUPT, online_start_ts=1000, game_ts=1000, title_history_ts=500)
+
+    assert state.apply(presence("online", "Halo Infinite"), 1100, 500) is None
+    assert state.apply(presence("online", "Halo Infinite"), 1200, 500) is None
+    assert (state.polls_processed, state.polls_skipped) == (0, 2)
+
+    # Title history change alone is enough to run the change detection
+    assert state.apply(presence("online", "Halo Infinite"), 1300, 600) == []
+    assert (state.polls_processed, state.polls_skipped) == (1, 2)
+    assert state.get_poll_stats_str() == "1 processed, 2 skipped (unchanged presence)"
@@ -85,6 +85,23 @@ STATUS_NOTIFICATION = False
 # Can also be disabled via the -e flag
 ERROR_NOTIFICATION = True
 
+# Email notifications are queued and sent in the background, so SMTP delays never block presence polling
+# How many times to retry sending a notification that failed to be delivered and the delay before the first retry
+# (doubled with every next retry); in seconds
+EMAIL_SEND_MAX_RETRIES = 3
+EMAIL_SEND_RETRY_DELAY = 30
+
+# The background worker keeps the authenticated SMTP connection open and sends queued notifications over it,
+# the connection is closed after being idle for that long; in seconds
+# Set to 0 to close it as soon as the queue is empty
+SMTP_IDLE_TIMEOUT = 60
+
+# Digest mode: collect notifications over that many seconds and send them as one summary email
+# Error notifications are always sent right away (together with the pending digest)
+# Can also be set using the --email-digest flag
+# Set to 0 to send every notification separately
+EMAIL_DIGEST_WINDOW = 0
+
 # How often to check for player activity when the user is offline; in seconds
 # Can also be set using the -c flag
 XBOX_CHECK_INTERVAL = 300  # 5 min
@@ -93,6 +110,30 @@ XBOX_CHECK_INTERVAL = 300  # 5 min
 # Can also be set using the -k flag
 XBOX_ACTIVE_CHECK_INTERVAL = 90  # 1,5 min
 
+# How often to check title history (used to detect gaming activity of users who "appear offline") while the user
+# is offline; in seconds. It is always checked right away when the user gets offline. Conditional requests
+# (ETag / If-None-Match) are used, so unchanged title history is cheap to re-check
+# Set to 0 to check it on every offline poll
+# Can also be set using the --title-history-interval flag
+TITLE_HISTORY_CHECK_INTERVAL = 900  # 15 mins
+
+# Whether to adapt polling intervals to the user's activity patterns learned from the CSV history (CSV_FILE),
+# it checks more often in the hours of the week when the user usually gets online and less often in dead hours
+# Can also be enabled via the --adaptive-polling flag
+ADAPTIVE_POLLING = False
+
+# Range of the offline polling interval used by adaptive polling; in seconds
+ADAPTIVE_MIN_CHECK_INTERVAL = 60  # 1 min
+ADAPTIVE_MAX_CHECK_INTERVAL = 900  # 15 mins
+
+# Global budget of presence checks per hour across all monitored users used by adaptive polling
+# Polling intervals are stretched proportionally when the budget would be exceeded (0 = no limit)
+ADAPTIVE_REQUEST_BUDGET = 0
+
+# When monitoring multiple users, presence checks falling due within this window are fetched
+# together via a single batch request (up to 1100 users per request); in seconds
+PRESENCE_BATCH_WINDOW = 5
+
 # Set your local time zone so that Xbox API timestamps are converted accordingly (e.g. 'Europe/Warsaw').
 # Use this command to list all time zones supported by pytz:
 #   python3 -c "import pytz; print('\\n'.join(pytz.all_timezones))"
@@ -104,6 +145,33 @@ LOCAL_TIMEZONE = 'Auto'
 # and previous session statistics (like total playtime and number of played games) will be preserved
 OFFLINE_INTERRUPT = 420  # 7 mins
 
+# Additional Xbox device types (platforms) reported in presence, checked before the built-in ones
+# Maps device code name (or its part, case insensitive) to a tuple of (short name, long name), for example:
+# XBOX_DEVICE_TYPES = {"newconsole": ("XNEW", "Xbox New Console")}
+# Device types unknown to the tool are listed at liveness checks (and in debug mode), so they can be added here
+XBOX_DEVICE_TYPES = {}
+
+# Whether to fetch presence as raw JSON and decode only the needed fields (state, last seen, devices & titles)
+# instead of validating the whole response with python-xbox models; it lowers CPU usage for high-volume polling
+# JSON is parsed with orjson if installed (pip install orjson)
+# Can also be enabled via the --fast-presence flag
+PRESENCE_FAST_PATH = False
+
+# Maximum number of concurrent Xbox Live API requests used when fetching user details (-i mode and startup)
+XBOX_API_MAX_CONCURRENCY = 5
+
+# Rate limit of Xbox Live API requests applied per endpoint (token bucket): requests per second and burst size
+# Set XBOX_API_RATE_LIMIT to 0 to disable rate limiting (Retry-After from the server is still honoured)
+XBOX_API_RATE_LIMIT = 5
+XBOX_API_RATE_BURST = 10
+
+# How many times to retry Xbox Live API requests failing with HTTP 429 (throttling), 5xx or transport errors
+# HTTP 429 waits as long as requested by Retry-After header, other errors use jittered exponential backoff
+# starting at XBOX_API_BACKOFF_BASE seconds and capped at XBOX_API_BACKOFF_MAX seconds
+XBOX_API_MAX_RETRIES = 3
+XBOX_API_BACKOFF_BASE = 2
+XBOX_API_BACKOFF_MAX = 60
+
 # How often to print a "liveness check" message to the output; in seconds
 # Set to 0 to disable
 LIVENESS_CHECK_INTERVAL = 43200  # 12 hours
@@ -117,10 +185,41 @@ CHECK_INTERNET_TIMEOUT = 5
 # After authentication, the access token will be saved to the following file
 MS_AUTH_TOKENS_FILE = "xbox_tokens.json"
 
+# File caching gamer tag to XUID mapping (with profile settings), so monitoring can start without the profile lookup
+# If no directory is specified, the file is stored next to MS_AUTH_TOKENS_FILE
+# Set to empty string to disable the cache
+XUID_CACHE_FILE = "xbox_xuid_cache.json"
+
+# How long cached gamer tag entries are used as they are; in seconds
+# Expired entries are still used (so startup does not wait for Xbox Live), but refreshed in the background
+XUID_CACHE_TTL = 604800  # 7 days
+
 # CSV file to write all status & game changes
 # Can also be set using the -b flag
+# When monitoring multiple users, the gamer tag is appended to the file name (e.g. xbox_<gamer_tag>.csv)
 CSV_FILE = ""
 
+# CSV file is kept open and rows are flushed to disk after every CSV_FLUSH_ROWS rows (and always on exit)
+# Set CSV_FSYNC to True to also fsync the file on every flush
+CSV_FLUSH_ROWS = 1
+CSV_FSYNC = False
+
+# SQLite database file to store all status & game changes of all monitored users (in addition to CSV files),
+# events are indexed by user and time; existing CSV files can be imported via the --import-csv flag
+# Can also be set using the --db-file flag
+# Leave empty to disable
+SQLITE_DB_FILE = ""
+
+# Events are inserted into SQLite in batches, committed once SQLITE_BATCH_SIZE events are pending or
+# SQLITE_COMMIT_INTERVAL seconds have passed since the first pending one (and always on exit)
+SQLITE_BATCH_SIZE = 20
+SQLITE_COMMIT_INTERVAL = 60
+
+# File with the list of Xbox gamer tags to monitor from a single process (one gamer tag per line, # starts a comment)
+# All users share one authenticated Xbox Live session
+# Can also be set using the --targets-file flag
+XBOX_TARGETS_FILE = ""
+
 # Location of the optional dotenv file which can keep secrets
 # If not specified it will try to auto-search for .env files
 # To disable auto-search, set this to the literal string "none"
@@ -128,6 +227,7 @@ CSV_FILE = ""
 DOTENV_FILE = ""
 
 # Base name for the log file. Output will be saved to xbox_monitor_<gamer_tag>.log
+# (or xbox_monitor_multi.log when monitoring multiple users)
 # Can include a directory path to specify the location, e.g. ~/some_dir/xbox_monitor
 XBOX_LOGFILE = "xbox_monitor"
 
@@ -135,6 +235,21 @@ XBOX_LOGFILE = "xbox_monitor"
 # Can also be disabled via the -d flag
 DISABLE_LOGGING = False
 
+# Log file output is buffered in memory and written by a background thread, it is flushed to disk every
+# LOG_FLUSH_INTERVAL seconds or once LOG_FLUSH_SIZE bytes are pending (and always on exit)
+# Up to LOG_BUFFER_MAX_MESSAGES messages can wait in the buffer (0 = unlimited), messages are dropped from the log file
+# (not from the console) when it is full, the number of dropped messages is noted in the log file
+LOG_FLUSH_INTERVAL = 1
+LOG_FLUSH_SIZE = 65536
+LOG_BUFFER_MAX_MESSAGES = 10000
+
+# Log file rotation: rotate once the log file exceeds LOG_ROTATE_MAX_SIZE bytes (0 = no size limit) and/or daily
+# (LOG_ROTATE_DAILY); rotated segments are gzipped (e.g. xbox_monitor_<gamer_tag>.log.20260101-000000.gz)
+# and only the newest LOG_ROTATE_KEEP of them are kept (0 = keep all)
+LOG_ROTATE_MAX_SIZE = 0  # e.g. 50 * 1024 * 1024 for 50 MB
+LOG_ROTATE_DAILY = False
+LOG_ROTATE_KEEP = 7
+
 # Width of horizontal line
 HORIZONTAL_LINE = 113
 
@@ -169,18 +284,50 @@ ACTIVE_INACTIVE_NOTIFICATION = False
 GAME_CHANGE_NOTIFICATION = False
 STATUS_NOTIFICATION = False
 ERROR_NOTIFICATION = False
+EMAIL_SEND_MAX_RETRIES = 0
+EMAIL_SEND_RETRY_DELAY = 0
+SMTP_IDLE_TIMEOUT = 0
+EMAIL_DIGEST_WINDOW = 0
 XBOX_CHECK_INTERVAL = 0
 XBOX_ACTIVE_CHECK_INTERVAL = 0
+TITLE_HISTORY_CHECK_INTERVAL = 0
+ADAPTIVE_POLLING = False
+ADAPTIVE_MIN_CHECK_INTERVAL = 0
+ADAPTIVE_MAX_CHECK_INTERVAL = 0
+ADAPTIVE_REQUEST_BUDGET = 0
+PRESENCE_BATCH_WINDOW = 0
 LOCAL_TIMEZONE = ""
 OFFLINE_INTERRUPT = 0
+XBOX_DEVICE_TYPES = {}
+PRESENCE_FAST_PATH = False
+XBOX_API_MAX_CONCURRENCY = 0
+XBOX_API_RATE_LIMIT = 0
+XBOX_API_RATE_BURST = 0
+XBOX_API_MAX_RETRIES = 0
+XBOX_API_BACKOFF_BASE = 0
+XBOX_API_BACKOFF_MAX = 0
 LIVENESS_CHECK_INTERVAL = 0
 CHECK_INTERNET_URL = ""
 CHECK_INTERNET_TIMEOUT = 0
 MS_AUTH_TOKENS_FILE = ""
+XUID_CACHE_FILE = ""
+XUID_CACHE_TTL = 0
 CSV_FILE = ""
+CSV_FLUSH_ROWS = 0
+CSV_FSYNC = False
+SQLITE_DB_FILE = ""
+SQLITE_BATCH_SIZE = 0
+SQLITE_COMMIT_INTERVAL = 0
+XBOX_TARGETS_FILE = ""
 DOTENV_FILE = ""
 XBOX_LOGFILE = ""
 DISABLE_LOGGING = False
+LOG_FLUSH_INTERVAL = 0
+LOG_FLUSH_SIZE = 0
+LOG_BUFFER_MAX_MESSAGES = 0
+LOG_ROTATE_MAX_SIZE = 0
+LOG_ROTATE_DAILY = False
+LOG_ROTATE_KEEP = 0
 HORIZONTAL_LINE = 0
 CLEAR_SCREEN = False
 XBOX_ACTIVE_CHECK_SIGNAL_VALUE = 0
@@ -199,6 +346,41 @@ LIVENESS_CHECK_COUNTER = LIVENESS_CHECK_INTERVAL / XBOX_CHECK_INTERVAL if XBOX_C
 stdout_bck = None
 csvfieldnames = ['Date', 'Status', 'Game name']
 
+# Gamer tag -> XUID cache, created on first use (see get_xuid_cache())
+xuid_cache = None
+
+# Adaptive polling scheduler, created in main() if ADAPTIVE_POLLING is enabled
+poll_scheduler = None
+
+# Open CSV writers per CSV file name (see get_csv_writer())
+csv_writers = {}
+
+# SQLite event store, created in main() if SQLITE_DB_FILE is set
+event_store = None
+
+# Background email notification queue, active while monitoring is running
+email_queue = None
+
+# Value returned by send_email() when the email could not be delivered (worth retrying, unlike settings errors)
+SEND_EMAIL_DELIVERY_ERROR = 2
+
+# Number of hour-of-week buckets used by adaptive polling (7 days * 24 hours)
+HOURS_PER_WEEK = 168
+
+# Token buckets & request counters per Xbox Live API endpoint (see xbl_request())
+XBL_API_RATE_LIMITERS = {}
+XBL_API_STATS = {}
+
+# Maximum number of XUIDs accepted by the Xbox presence batch endpoint
+PRESENCE_BATCH_MAX_XUIDS = 1100
+
+# Maximum number of XUIDs requested at once via the Xbox profile batch endpoint
+PROFILE_BATCH_MAX_XUIDS = 100
+
+# Margin used by the achievements deep scan when comparing title last played time with unlock times, as the last
+# played time is set when the gaming session starts and achievements can be unlocked later in the session; in seconds
+ACHIEVEMENTS_SCAN_SESSION_MARGIN = 43200  # 12 hours
+
 CLI_CONFIG_PATH = None
 
 # to solve the issue: 'SyntaxError: f-string expression part cannot include a backslash'
@@ -217,11 +399,14 @@ if sys.version_info < (3, 8):
 
 import time
 import json
+import heapq
+from collections import namedtuple
+from functools import lru_cache
 from typing import List, cast
 import os
 from datetime import datetime, timezone
 from dateutil import relativedelta
-from dateutil.parser import isoparse
+from dateutil.parser import isoparse, parse as dateutil_parse
 import calendar
 import requests as req
 import signal
@@ -232,6 +417,7 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import argparse
 import csv
+import sqlite3
 try:
     import pytz
 except ModuleNotFoundError:
@@ -240,11 +426,21 @@ try:
     from tzlocal import get_localzone
 except ImportError:
     get_localzone = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import platform
 import re
 import ipaddress
 import asyncio
-from httpx import HTTPStatusError
+import random
+import threading
+import queue
+import atexit
+import gzip
+from email.utils import parsedate_to_datetime
+from httpx import HTTPStatusError, TransportError
 try:
     from pythonxbox.api.client import XboxLiveClient
     from pythonxbox.authentication.manager import AuthenticationManager
@@ -252,36 +448,142 @@ try:
     from pythonxbox.common.signed_session import SignedSession
     from pythonxbox.api.provider.presence.models import PresenceLevel
     from pythonxbox.api.provider.people.models import PeopleDecoration
-    from pythonxbox.api.provider.titlehub.models import TitleFields
+    from pythonxbox.api.provider.titlehub.models import TitleFields, TitleHubResponse
     from pythonxbox.api.provider.userstats.models import GeneralStatsField
+    from pythonxbox.common.exceptions import RateLimitExceededException
 except ModuleNotFoundError:
     raise SystemExit("Error: Couldn't find the Python-Xbox library !\n\nTo install it, run:\n    pip install python-xbox\n\nOnce installed, re-run this tool. For more help, visit:\nhttps://github.com/tr4nt0r/python-xbox/")
 import shutil
 from pathlib import Path
+from contextlib import AsyncExitStack
 
 
 # Logger class to output messages to stdout and log file
+# Log file writes go through an in-memory buffer (SimpleQueue, safe to use from signal handlers) drained by
+# a background thread which flushes the file every LOG_FLUSH_INTERVAL seconds or after LOG_FLUSH_SIZE bytes
+# The same thread also rotates the log file (see LOG_ROTATE_* options), so printing never races with rotation
 class Logger(object):
     def __init__(self, filename):
         self.terminal = sys.stdout
-        self.logfile = open(filename, "a", buffering=1, encoding="utf-8")
+        self.filename = filename
+        self.logfile = open(filename, "a", encoding="utf-8")
+        self.logfile_size = os.path.getsize(filename)
+        self.logfile_date = datetime.fromtimestamp(os.path.getmtime(filename), pytz.timezone(LOCAL_TIMEZONE)).date() if self.logfile_size else now_local().date()
+        self.at_line_start = True
+        self.buffer = queue.SimpleQueue()
+        self.dropped_messages = 0
+        self.closed = False
+        self.drain_thread = threading.Thread(target=self.drain, name="log-writer", daemon=True)
+        self.drain_thread.start()
+        atexit.register(self.close)
 
     def write(self, message):
         global STDOUT_AT_START_OF_LINE
-        if message:
-            STDOUT_AT_START_OF_LINE = message.endswith('\n')
+        if not message:
+            return
+        STDOUT_AT_START_OF_LINE = message.endswith('\n')
         self.terminal.write(message)
-        # Expand tabs for file output (stdout remains untouched)
-        self.logfile.write(message.expandtabs(8))
+        if STDOUT_AT_START_OF_LINE:
+            self.terminal.flush()
+        if self.closed:
+            return
+        # Never block the caller (asyncio loop, signal handlers) if the background thread can't keep up, drop the
+        # message instead; SimpleQueue put() & qsize() take no locks, so they are safe to use from signal handlers
+        if 0 < LOG_BUFFER_MAX_MESSAGES <= self.buffer.qsize():
+            self.dropped_messages += 1
+            return
+        self.buffer.put(message)
+
+    # Flushes the terminal and asks the background thread to flush the log file right away
+    def flush(self):
         self.terminal.flush()
-        self.logfile.flush()
+        if not self.closed:
+            self.buffer.put("")
 
-    def flush(self):
-        pass
+    # Writes buffered messages to the log file; "" requests an immediate flush, None stops the thread
+    def drain(self):
+        pending_size = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                message = self.buffer.get(timeout=max(0.05, LOG_FLUSH_INTERVAL - (time.monotonic() - last_flush)))
+            except queue.Empty:
+                message = ""
+            if message and self.dropped_messages and self.at_line_start:
+                dropped_messages, self.dropped_messages = self.dropped_messages, 0
+                message = f"* {dropped_messages} log message(s) dropped, log buffer was full\n" + message
+            if message:
+                if self.rotation_due():
+                    self.rotate()
+                # Expand tabs for file output (stdout remains untouched)
+                message = message.expandtabs(8)
+                self.logfile.write(message)
+                message_size = len(message.encode("utf-8"))
+                self.logfile_size += message_size
+                self.at_line_start = message.endswith('\n')
+                pending_size += message_size
+            if message is None or (pending_size and (not message or pending_size >= LOG_FLUSH_SIZE or time.monotonic() - last_flush >= LOG_FLUSH_INTERVAL)):
+                try:
+                    self.logfile.flush()
+                except Exception:
+                    pass
+                pending_size = 0
+                last_flush = time.monotonic()
+            if message is None:
+                try:
+                    self.logfile.close()
+                except Exception:
+                    pass
+                return
+
+    # Returns True if the log file should be rotated before the next write (only at the start of a line)
+    def rotation_due(self):
+        if not self.at_line_start:
+            return False
+        if LOG_ROTATE_DAILY and now_local().date() != self.logfile_date:
+            return True
+        return LOG_ROTATE_MAX_SIZE > 0 and self.logfile_size >= LOG_ROTATE_MAX_SIZE
+
+    # Closes the current log file, compresses it to a timestamped .gz archive, removes the oldest archives
+    # above LOG_ROTATE_KEEP and starts a new log file
+    def rotate(self):
+        try:
+            self.logfile.close()
+            rotated_name = rotated_base = f"{self.filename}.{now_local().strftime('%Y%m%d-%H%M%S')}"
+            suffix = 1
+            while os.path.exists(rotated_name + ".gz"):
+                rotated_name = f"{rotated_base}-{suffix}"
+                suffix += 1
+            os.replace(self.filename, rotated_name)
+            with open(rotated_name, "rb") as f_in, gzip.open(rotated_name + ".gz", "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            os.remove(rotated_name)
+            if LOG_ROTATE_KEEP > 0:
+                log_dir, log_name = os.path.split(os.path.abspath(self.filename))
+                archives = sorted((os.path.join(log_dir, f) for f in os.listdir(log_dir) if f.startswith(log_name + ".") and f.endswith(".gz")), key=os.path.getmtime)
+                for archive in archives[:-LOG_ROTATE_KEEP]:
+                    os.remove(archive)
+        except Exception as e:
+            self.terminal.write(f"* Error rotating log file '{self.filename}': {e}\n")
+        self.logfile = open(self.filename, "a", encoding="utf-8")
+        self.logfile_size = os.path.getsize(self.filename)
+        self.logfile_date = now_local().date()
+
+    # Flushes all buffered messages to the log file and stops the background thread
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.terminal.flush()
+        self.buffer.put(None)
+        if threading.current_thread() is not self.drain_thread:
+            self.drain_thread.join(timeout=5)
 
 
 # Signal handler when user presses Ctrl+C
 def signal_handler(sig, frame):
+    if isinstance(sys.stdout, Logger):
+        sys.stdout.close()
     sys.stdout = stdout_bck
     print('\n* You pressed Ctrl+C, tool is terminated.')
     sys.exit(0)
@@ -322,6 +624,21 @@ def debug_print(message):
         STDOUT_AT_START_OF_LINE = True
 
 
+# Prints step message (without new line), completed later via print_ok()
+def print_step(msg):
+    global STDOUT_AT_START_OF_LINE
+    sys.stdout.write(f"- {msg}".ljust(32))
+    sys.stdout.flush()
+    STDOUT_AT_START_OF_LINE = False
+
+
+# Prints OK to complete the step message
+def print_ok():
+    global STDOUT_AT_START_OF_LINE
+    print("OK")
+    STDOUT_AT_START_OF_LINE = True
+
+
 # Starts interactive OAuth flow and stores the new OAuth token on the auth manager
 async def oauth_interactive_auth(auth_mgr):
     print("\nAuthorizing via OAuth ...")
@@ -366,6 +683,122 @@ async def authenticate_and_refresh_tokens(auth_mgr):
         f.write(auth_mgr.oauth.model_dump_json())
 
 
+# Token bucket limiting request rate of a single Xbox Live API endpoint, it can also be blocked for the time
+# requested by the server (Retry-After)
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block_for(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+# Returns number of seconds to wait from Retry-After header value (seconds or HTTP date), None if missing/invalid
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+# Returns jittered exponential backoff delay for the given retry attempt; in seconds
+def get_backoff_delay(attempt):
+    delay = min(XBOX_API_BACKOFF_MAX, XBOX_API_BACKOFF_BASE * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# Calls Xbox Live API function with per-endpoint rate limiting, honours Retry-After on HTTP 429 and retries 5xx & transport
+# errors with jittered exponential backoff; func(*args, **kwargs) is called again on every attempt
+async def xbl_request(endpoint, func, *args, **kwargs):
+    if endpoint not in XBL_API_RATE_LIMITERS:
+        XBL_API_RATE_LIMITERS[endpoint] = TokenBucket(XBOX_API_RATE_LIMIT, XBOX_API_RATE_BURST)
+        XBL_API_STATS[endpoint] = {"requests": 0, "throttled": 0, "retries": 0, "errors": 0}
+    bucket = XBL_API_RATE_LIMITERS[endpoint]
+    stats = XBL_API_STATS[endpoint]
+
+    attempt = 0
+    while True:
+        await bucket.acquire()
+        stats["requests"] += 1
+        try:
+            return await func(*args, **kwargs)
+        except HTTPStatusError as e:
+            status_code = e.response.status_code
+            if status_code == 429:
+                stats["throttled"] += 1
+                delay = parse_retry_after(e.response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = get_backoff_delay(attempt)
+                bucket.block_for(delay)
+            elif status_code < 500:
+                stats["errors"] += 1
+                raise
+            else:
+                delay = get_backoff_delay(attempt)
+            error = e
+        except RateLimitExceededException as e:
+            stats["throttled"] += 1
+            delay = get_backoff_delay(attempt)
+            if e.try_again_in:
+                delay = max(0.0, (e.try_again_in - datetime.now(e.try_again_in.tzinfo)).total_seconds())
+            bucket.block_for(delay)
+            error = e
+        except TransportError as e:
+            delay = get_backoff_delay(attempt)
+            error = e
+
+        if attempt >= XBOX_API_MAX_RETRIES:
+            stats["errors"] += 1
+            raise error
+        attempt += 1
+        stats["retries"] += 1
+        debug_print(f"Xbox API request '{endpoint}' failed ({error}), retry {attempt}/{XBOX_API_MAX_RETRIES} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+# Returns Xbox Live API request counters in human readable format; eg. presence: 120 requests, 1 throttled, 2 retries, 0 errors
+def get_xbl_api_stats_str():
+    return "; ".join(f"{endpoint}: {x['requests']} requests, {x['throttled']} throttled, {x['retries']} retries, {x['errors']} errors" for endpoint, x in XBL_API_STATS.items())
+
+
+# Prints process-wide stats shown at liveness checks: Xbox Live API counters and unknown device types (if any)
+# Returns True if anything was printed
+def print_global_stats():
+    printed = False
+    if XBL_API_STATS:
+        print(f"* Xbox API stats: {get_xbl_api_stats_str()}")
+        printed = True
+    if xbox_unknown_device_types:
+        print(f"* Unknown Xbox device types: {', '.join(sorted(xbox_unknown_device_types))} (can be added to XBOX_DEVICE_TYPES)")
+        printed = True
+    return printed
+
+
 # Returns a debug-friendly timestamp representation, prevents "Unix epoch" confusion when ts is 0/missing
 def get_debug_date_from_ts(ts):
     if isinstance(ts, (int, float)) and ts <= 0:
@@ -485,8 +918,52 @@ def calculate_timespan(timestamp1, timestamp2, show_weeks=True, show_hours=True,
         return '0 seconds'
 
 
-# Sends email notification
-def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
+# Authenticated SMTP connection which can be reused for several messages, reconnects if the server dropped it
+class SMTPConnection:
+    def __init__(self, smtp_timeout=15):
+        self.smtp_timeout = smtp_timeout
+        self.smtp = None
+
+    def connect(self, use_ssl):
+        self.smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=self.smtp_timeout)
+        try:
+            if use_ssl:
+                ssl_context = ssl.create_default_context()
+                self.smtp.starttls(context=ssl_context)
+            self.smtp.login(SMTP_USER, SMTP_PASSWORD)
+        except Exception:
+            self.close()
+            raise
+        debug_print(f"SMTP connection to {SMTP_HOST}:{SMTP_PORT} established")
+
+    def send(self, email_msg, use_ssl):
+        reconnected = self.smtp is None
+        if reconnected:
+            self.connect(use_ssl)
+        try:
+            self.smtp.sendmail(SENDER_EMAIL, RECEIVER_EMAIL, email_msg.as_string())
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Kept-alive connection might have been closed by the server in the meantime
+            self.close()
+            if reconnected:
+                raise
+            self.connect(use_ssl)
+            self.smtp.sendmail(SENDER_EMAIL, RECEIVER_EMAIL, email_msg.as_string())
+
+    def close(self):
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except Exception:
+            pass
+        self.smtp = None
+        debug_print("SMTP connection closed")
+
+
+# Sends email notification; returns 0 on success, 1 on incorrect settings and SEND_EMAIL_DELIVERY_ERROR on delivery failure
+# If smtp_connection is passed, it is reused and left open, otherwise a new connection is used for this email only
+def send_email(subject, body, body_html, use_ssl, smtp_timeout=15, smtp_connection=None):
     fqdn_re = re.compile(r'(?=^.{4,253}$)(^((?!-)[a-zA-Z0-9-]{1,63}(?<!-)\.)+[a-zA-Z]{2,63}\.?$)')
     email_re = re.compile(r'[^@]+@[^@]+\.[^@]+')
 
@@ -521,14 +998,8 @@ def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
         print("Error sending email - SMTP settings are incorrect (body and body_html cannot be empty at the same time)")
         return 1
 
+    connection = smtp_connection or SMTPConnection(smtp_timeout)
     try:
-        if use_ssl:
-            ssl_context = ssl.create_default_context()
-            smtpObj = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=smtp_timeout)
-            smtpObj.starttls(context=ssl_context)
-        else:
-            smtpObj = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=smtp_timeout)
-        smtpObj.login(SMTP_USER, SMTP_PASSWORD)
         email_msg = MIMEMultipart('alternative')
         email_msg["From"] = SENDER_EMAIL
         email_msg["To"] = RECEIVER_EMAIL
@@ -544,21 +1015,205 @@ def send_email(subject, body, body_html, use_ssl, smtp_timeout=15):
             part2 = MIMEText(body_html.encode('utf-8'), 'html', _charset='utf-8')
             email_msg.attach(part2)
 
-        smtpObj.sendmail(SENDER_EMAIL, RECEIVER_EMAIL, email_msg.as_string())
-        smtpObj.quit()
+        connection.send(email_msg, use_ssl)
     except Exception as e:
         print(f"Error sending email: {e}")
-        return 1
+        connection.close()
+        return SEND_EMAIL_DELIVERY_ERROR
+    finally:
+        if not smtp_connection:
+            connection.close()
     return 0
 
 
+# Queue of email notifications drained by a background worker, emails are sent in a thread executor
+# so the blocking SMTP session never stalls the event loop; failed deliveries are retried with backoff
+# Queued emails are sent over one SMTP connection which is kept open until idle for idle_timeout seconds
+# If digest_window is set, non-urgent notifications are coalesced into one summary email sent after that many seconds
+class EmailNotificationQueue:
+    def __init__(self, max_retries, retry_delay, idle_timeout=0, digest_window=0):
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+        self.digest_window = digest_window
+        self.queue = asyncio.Queue()
+        self.worker_task = None
+        self.smtp_connection = SMTPConnection()
+        self.digest = []
+        self.digest_handle = None
+
+    def start(self):
+        self.worker_task = asyncio.ensure_future(self.worker())
+
+    def put(self, subject, body, body_html, use_ssl, urgent=False):
+        if self.digest_window > 0 and not body_html:
+            if not urgent:
+                self.digest.append((subject, body, use_ssl))
+                if not self.digest_handle:
+                    self.digest_handle = asyncio.get_running_loop().call_later(self.digest_window, self.flush_digest)
+                return
+            self.flush_digest()
+        self.queue.put_nowait((subject, body, body_html, use_ssl))
+
+    # Queues collected notifications as one digest email (a single notification is sent as-is)
+    def flush_digest(self):
+        if self.digest_handle:
+            self.digest_handle.cancel()
+            self.digest_handle = None
+        if not self.digest:
+            return
+        items, self.digest = self.digest, []
+        if len(items) == 1:
+            subject, body, use_ssl = items[0]
+        else:
+            subject = f"xbox_monitor: {len(items)} notifications (latest: {items[-1][0]})"
+            body = f"\n\n{'-' * 60}\n\n".join(f"{item_subject}\n\n{item_body}" for item_subject, item_body, _ in items)
+            use_ssl = items[-1][2]
+        debug_print(f"Email digest: queueing {len(items)} notification(s)")
+        self.queue.put_nowait((subject, body, "", use_ssl))
+
+    # Waits for the next queued email, closes the SMTP connection once it has been idle for idle_timeout seconds
+    async def get_next(self, loop):
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        if self.smtp_connection.smtp is not None:
+            try:
+                return await asyncio.wait_for(self.queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await loop.run_in_executor(None, self.smtp_connection.close)
+        return await self.queue.get()
+
+    async def worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            subject, body, body_html, use_ssl = await self.get_next(loop)
+            try:
+                attempt = 0
+                while await loop.run_in_executor(None, send_email, subject, body, body_html, use_ssl, 15, self.smtp_connection) == SEND_EMAIL_DELIVERY_ERROR and attempt < self.max_retries:
+                    delay = self.retry_delay * (2 ** attempt)
+                    attempt += 1
+                    print(f"* Retrying email notification '{subject}' in {display_time(delay)} ({attempt}/{self.max_retries})")
+                    await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"* Error in email notification worker: {e}")
+            finally:
+                self.queue.task_done()
+
+    # Waits (up to timeout seconds) for the queued notifications to be sent and stops the worker
+    async def close(self, timeout=30):
+        if not self.worker_task:
+            return
+        self.flush_digest()
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"* {self.queue.qsize()} queued email notification(s) could not be sent before exit")
+        self.worker_task.cancel()
+        await asyncio.gather(self.worker_task, return_exceptions=True)
+        self.worker_task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.smtp_connection.close)
+
+
+# Sends email notification via background queue if monitoring is running, otherwise sends it right away
+# Urgent notifications (errors) bypass the digest
+def notify_email(subject, body, body_html, use_ssl, urgent=False):
+    if email_queue:
+        email_queue.put(subject, body, body_html, use_ssl, urgent)
+    else:
+        send_email(subject, body, body_html, use_ssl)
+
+
+# Runs the monitoring coroutine with the background email notification queue, pending emails are sent before exit
+async def run_with_email_queue(coro):
+    global email_queue
+    email_queue = EmailNotificationQueue(EMAIL_SEND_MAX_RETRIES, EMAIL_SEND_RETRY_DELAY, SMTP_IDLE_TIMEOUT, EMAIL_DIGEST_WINDOW)
+    email_queue.start()
+    try:
+        return await coro
+    finally:
+        await email_queue.close()
+        email_queue = None
+
+
+# Long-lived CSV writer keeping the file open, rows are flushed every flush_rows rows (optionally fsynced)
+# The file is reopened automatically if it has been rotated or removed in the meantime
+class CSVWriter:
+    def __init__(self, file_name, flush_rows=1, fsync=False):
+        self.file_name = file_name
+        self.flush_rows = max(1, flush_rows)
+        self.fsync = fsync
+        self.csv_file = None
+        self.writer = None
+        self.file_id = None
+        self.pending_rows = 0
+        self.open()
+
+    # Opens the file for appending and writes the header if the file is new/empty
+    def open(self):
+        self.csv_file = open(self.file_name, 'a', newline='', encoding="utf-8")
+        self.writer = csv.DictWriter(self.csv_file, fieldnames=csvfieldnames, quoting=csv.QUOTE_NONNUMERIC)
+        stat = os.fstat(self.csv_file.fileno())
+        self.file_id = (stat.st_dev, stat.st_ino)
+        if stat.st_size == 0:
+            self.writer.writeheader()
+            self.flush()
+
+    # Returns True if the file on disk is not the one we hold open (rotated or removed)
+    def is_stale(self):
+        try:
+            stat = os.stat(self.file_name)
+        except FileNotFoundError:
+            return True
+        return (stat.st_dev, stat.st_ino) != self.file_id
+
+    def write(self, row):
+        if self.is_stale():
+            self.close()
+            self.open()
+        self.writer.writerow(row)
+        self.pending_rows += 1
+        if self.pending_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        self.csv_file.flush()
+        if self.fsync:
+            os.fsync(self.csv_file.fileno())
+        self.pending_rows = 0
+
+    def close(self):
+        if not self.csv_file:
+            return
+        try:
+            self.flush()
+            self.csv_file.close()
+        except Exception:
+            pass
+        self.csv_file = None
+
+
+# Returns the open CSV writer for the file (created on first use)
+def get_csv_writer(csv_file_name):
+    writer = csv_writers.get(csv_file_name)
+    if writer is None:
+        if not csv_writers:
+            atexit.register(close_csv_writers)
+        writer = CSVWriter(csv_file_name, CSV_FLUSH_ROWS, CSV_FSYNC)
+        csv_writers[csv_file_name] = writer
+    return writer
+
+
+# Flushes and closes all open CSV writers
+def close_csv_writers():
+    for writer in csv_writers.values():
+        writer.close()
+    csv_writers.clear()
+
+
 # Initializes the CSV file
 def init_csv_file(csv_file_name):
     try:
-        if not os.path.isfile(csv_file_name) or os.path.getsize(csv_file_name) == 0:
-            with open(csv_file_name, 'a', newline='', buffering=1, encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=csvfieldnames, quoting=csv.QUOTE_NONNUMERIC)
-                writer.writeheader()
+        get_csv_writer(csv_file_name)
     except Exception as e:
         raise RuntimeError(f"Could not initialize CSV file '{csv_file_name}': {e}")
 
@@ -566,13 +1221,401 @@ def init_csv_file(csv_file_name):
 # Writes CSV entry
 def write_csv_entry(csv_file_name, timestamp, status, gamename):
     try:
+        get_csv_writer(csv_file_name).write({'Date': timestamp, 'Status': status, 'Game name': gamename})
+    except Exception as e:
+        raise RuntimeError(f"Failed to write to CSV file '{csv_file_name}': {e}")
+
+
+# SQLite store of status & game changes of all monitored users (WAL mode, batched inserts)
+class EventStore:
+    def __init__(self, db_file, batch_size=20, commit_interval=60):
+        self.db_file = db_file
+        self.batch_size = max(1, batch_size)
+        self.commit_interval = commit_interval
+        self.pending = []
+        self.pending_since = 0
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            xuid INTEGER,
+            gamertag TEXT NOT NULL COLLATE NOCASE,
+            platform TEXT,
+            status TEXT NOT NULL,
+            game TEXT
+        )""")
+        # Unique index also serves queries by user & time and makes CSV re-imports idempotent
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_events_gamertag_ts ON events (gamertag, ts, status, game)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_events_xuid_ts ON events (xuid, ts)")
+        self.conn.commit()
+        atexit.register(self.close)
+
+    # Adds the event, it is inserted with the next batch
+    def add(self, ts, xuid, gamertag, platform, status, game):
+        if not self.pending:
+            self.pending_since = time.time()
+        self.pending.append((int(ts), int(xuid) if xuid else None, gamertag, platform or "", status, game or ""))
+        if len(self.pending) >= self.batch_size:
+            self.commit()
+        else:
+            self.commit_if_due()
+
+    # Inserts pending events if the commit interval has passed
+    def commit_if_due(self):
+        if self.pending and time.time() - self.pending_since >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        if not self.pending or not self.conn:
+            return
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO events (ts, xuid, gamertag, platform, status, game) VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+        debug_print(f"Event store: {len(self.pending)} event(s) committed to '{self.db_file}'")
+        self.pending = []
+
+    # Imports existing CSV file of the user (Date, Status, Game name), returns number of imported events
+    def import_csv(self, csv_file_name, gamertag, xuid=None):
+        rows = [(ts, int(xuid) if xuid else None, gamertag, "", status, game) for ts, status, game in iter_csv_events(csv_file_name)]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO events (ts, xuid, gamertag, platform, status, game) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self.conn.total_changes - before
+
+    def close(self):
+        if not self.conn:
+            return
+        try:
+            self.commit()
+            self.conn.close()
+        except Exception as e:
+            print(f"* Error closing event store '{self.db_file}': {e}")
+        self.conn = None
+
+
+# Yields (ts, status, game) events from the CSV file in a single streaming pass (dates are in LOCAL_TIMEZONE)
+# If since_ts is set, it starts with the last event before since_ts (user's state at the beginning of the range)
+def iter_csv_events(csv_file_name, since_ts=0, until_ts=None):
+    tz = pytz.timezone(LOCAL_TIMEZONE)
+    last_before = None
+    with open(csv_file_name, newline='', encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            date = parse_csv_date(row.get("Date") or "")
+            if not date or not row.get("Status"):
+                continue
+            ts = int(date.timestamp() if date.tzinfo else tz.localize(date).timestamp())
+            event = (ts, row["Status"], row.get("Game name") or "")
+            if ts < since_ts:
+                last_before = event
+                continue
+            if last_before:
+                yield last_before
+                last_before = None
+            if until_ts is not None and ts >= until_ts:
+                return
+            yield event
+    if last_before:
+        yield last_before
+
+
+# Yields (ts, status, game) events of the user from the SQLite event store using indexed range scans on (gamertag, ts),
+# starting with the last event before since_ts (user's state at the beginning of the range)
+def iter_db_events(conn, gamertag, since_ts, until_ts):
+    row = conn.execute("SELECT ts, status, game FROM events WHERE gamertag = ? AND ts < ? ORDER BY ts DESC LIMIT 1", (gamertag, since_ts)).fetchone()
+    if row:
+        yield row
+    yield from conn.execute("SELECT ts, status, game FROM events WHERE gamertag = ? AND ts >= ? AND ts < ? ORDER BY ts", (gamertag, since_ts, until_ts))
+
+
+# Reconstructs online sessions and game sessions from the stream of status & game transitions (fed in time order)
+# applying the same OFFLINE_INTERRUPT rule as the live monitor (user getting online again after a short offline
+# interruption continues the previous session), it works incrementally with O(1) work per event
+# Finished sessions are passed to on_session(start_ts, end_ts, games_number, game_total_ts) and
+# on_game_session(game, start_ts, end_ts); an online session is finished once the offline interruption exceeds
+# offline_interrupt (known with the next online event) or in finish()
+class SessionBuilder:
+    def __init__(self, offline_interrupt, on_session=None, on_game_session=None):
+        self.offline_interrupt = offline_interrupt
+        self.on_session = on_session
+        self.on_game_session = on_game_session
+        self.status = ""
+        self.online_start_ts = 0
+        self.game = ""
+        self.game_start_ts = 0
+        self.games_number = 0
+        self.game_total_ts = 0
+        self.offline_session = None
+
+    def add(self, ts, status, game):
+        if status != "offline":
+            game = game or ""
+            if not self.status or self.status == "offline":
+                if self.offline_session and ts - self.offline_session[1] <= self.offline_interrupt:
+                    # Short offline interruption, continue the previous session
+                    self.online_start_ts, _, self.games_number, self.game_total_ts = self.offline_session
+                else:
+                    self.emit_offline_session()
+                    self.online_start_ts = ts
+                    self.games_number = 0
+                    self.game_total_ts = 0
+                self.offline_session = None
+            if game != self.game:
+                self.end_game(ts)
+                if game:
+                    self.game = game
+                    self.game_start_ts = ts
+                    self.games_number += 1
+        elif self.status and self.status != "offline":
+            self.end_game(ts)
+            self.offline_session = (self.online_start_ts, ts, self.games_number, self.game_total_ts)
+            self.online_start_ts = 0
+        self.status = status
+
+    def end_game(self, ts):
+        if not self.game:
+            return
+        self.game_total_ts += ts - self.game_start_ts
+        if self.on_game_session:
+            self.on_game_session(self.game, self.game_start_ts, ts)
+        self.game = ""
+        self.game_start_ts = 0
+
+    def emit_offline_session(self):
+        if self.offline_session and self.on_session:
+            self.on_session(*self.offline_session)
+        self.offline_session = None
+
+    # Returns (start_ts, games_number, game_total_ts) of the ongoing online session, None if the user is offline
+    def current_session(self, now_ts):
+        if not self.status or self.status == "offline":
+            return None
+        game_total_ts = self.game_total_ts + (now_ts - self.game_start_ts if self.game else 0)
+        return self.online_start_ts, self.games_number, game_total_ts
+
+    # Finishes the ongoing sessions at end_ts (e.g. end of the report range or now)
+    def finish(self, end_ts):
+        if self.status and self.status != "offline":
+            self.add(end_ts, "offline", "")
+        self.emit_offline_session()
+        self.status = ""
+
+
+# Aggregates user's status & game events (fed in time order) clipped to the [since_ts, until_ts) range: online time
+# and sessions, time and sessions per game and online time per day; memory does not depend on the number of events
+class ActivityReport:
+    def __init__(self, since_ts, until_ts):
+        self.since_ts = since_ts
+        self.until_ts = until_ts
+        self.online_time = 0
+        self.sessions = 0
+        self.games = {}
+        self.days = {}
+        self.sessions_builder = SessionBuilder(OFFLINE_INTERRUPT, self.add_session, self.add_game_session)
+
+    def add(self, ts, status, game):
+        self.sessions_builder.add(ts, status, game)
+
+    # Closes the last (ongoing) sessions at the end of the range (or now)
+    def finish(self):
+        self.sessions_builder.finish(min(self.until_ts, int(time.time())))
+
+    def add_session(self, start_ts, end_ts, games_number, game_total_ts):
+        start = max(start_ts, self.since_ts)
+        end = min(end_ts, self.until_ts)
+        if end <= start:
+            return
+        self.sessions += 1
+        self.online_time += end - start
+        tz = pytz.timezone(LOCAL_TIMEZONE)
+        while start < end:
+            day = datetime.fromtimestamp(start, tz).date()
+            next_day = int(tz.localize(datetime(day.year, day.month, day.day) + relativedelta.relativedelta(days=1)).timestamp())
+            self.days[day] = self.days.get(day, 0) + min(end, next_day) - start
+            start = next_day
+
+    def add_game_session(self, game, start_ts, end_ts):
+        start = max(start_ts, self.since_ts)
+        end = min(end_ts, self.until_ts)
+        if end <= start:
+            return
+        game_stats = self.games.setdefault(game, [0, 0])
+        game_stats[0] += end - start
+        game_stats[1] += 1
+
+    # Returns [(game, seconds, sessions), ...] sorted by played time
+    def top_games(self, count=None):
+        games = sorted(((game, x[0], x[1]) for game, x in self.games.items()), key=lambda x: x[1], reverse=True)
+        return games[:count] if count else games
+
+
+# Prints the history report of the user: summary, games, daily or online (only users online within the range)
+def print_activity_report(query_type, gamertag, report, top_count):
+    if query_type == "online":
+        if report.online_time > 0:
+            print(f"{gamertag}:\t\t{display_time(report.online_time)} online ({report.sessions} sessions)")
+        return
+
+    print(f"\nUser {gamertag}:\n")
+    if query_type == "summary":
+        print(f"Online time:\t\t{display_time(report.online_time)}")
+        print(f"Online sessions:\t{report.sessions}")
+        print(f"Games played:\t\t{len(report.games)}")
+        if report.games:
+            print(f"\nTop {min(top_count, len(report.games))} games:\n")
+    if query_type in ("summary", "games"):
+        for game, seconds, sessions in report.top_games(top_count if query_type == "summary" else None):
+            print(f"{game}:\t{display_time(seconds)} ({sessions} sessions)")
+    elif query_type == "daily":
+        for day in sorted(report.days):
+            print(f"{day.strftime('%a %d %b %Y')}:\t{report.days[day] / 3600:.1f} hours")
+
+
+# Runs history query over the SQLite event store (SQLITE_DB_FILE) or the CSV file (CSV_FILE), returns exit code
+def run_history_query(query_type, gamertags, since_str, until_str, top_count):
+    try:
+        since_ts = int(tz_localize_date(dateutil_parse(since_str)).timestamp()) if since_str else 0
+        until_ts = int(tz_localize_date(dateutil_parse(until_str)).timestamp()) if until_str else int(time.time()) + 1
+    except (ValueError, OverflowError) as e:
+        print(f"* Error: Invalid --since / --until date: {e}")
+        return 1
 
-        with open(csv_file_name, 'a', newline='', buffering=1, encoding="utf-8") as csv_file:
-            csvwriter = csv.DictWriter(csv_file, fieldnames=csvfieldnames, quoting=csv.QUOTE_NONNUMERIC)
-            csvwriter.writerow({'Date': timestamp, 'Status': status, 'Game name': gamename})
+    conn = None
+    if SQLITE_DB_FILE:
+        db_file = os.path.expanduser(SQLITE_DB_FILE)
+        if not os.path.isfile(db_file):
+            print(f"* Error: SQLite database '{db_file}' does not exist")
+            return 1
+        conn = sqlite3.connect(db_file)
+        if not gamertags:
+            gamertags = [row[0] for row in conn.execute("SELECT DISTINCT gamertag FROM events ORDER BY gamertag")]
+        sources = [(gamertag, iter_db_events(conn, gamertag, since_ts, until_ts)) for gamertag in gamertags]
+    elif CSV_FILE:
+        if len(gamertags) > 1:
+            print("* Error: CSV file contains history of a single user, use SQLite database (--db-file) for multiple users")
+            return 1
+        csv_file_name = os.path.expanduser(CSV_FILE)
+        sources = [(gamertags[0] if gamertags else csv_file_name, iter_csv_events(csv_file_name, since_ts, until_ts))]
+    else:
+        print("* Error: History query requires SQLite database (SQLITE_DB_FILE / --db-file) or CSV file (CSV_FILE / -b)")
+        return 1
 
+    print(f"* History query: {query_type} ({get_date_from_ts(since_ts) if since_ts else 'beginning'} - {get_date_from_ts(until_ts)})")
+    if query_type == "online":
+        print()
+    try:
+        for gamertag, events in sources:
+            report = ActivityReport(since_ts, until_ts)
+            for ts, status, game in events:
+                report.add(ts, status, game)
+            report.finish()
+            print_activity_report(query_type, gamertag, report, top_count)
     except Exception as e:
-        raise RuntimeError(f"Failed to write to CSV file '{csv_file_name}': {e}")
+        print(f"* Error: History query failed: {e}")
+        return 1
+    finally:
+        if conn:
+            conn.close()
+    return 0
+
+
+# Adaptive polling scheduler, learns per-user hour-of-week histogram of online transitions (from the CSV history
+# and at runtime) and derives the offline check interval from it, all intervals are kept within the global request budget
+class AdaptivePollScheduler:
+    def __init__(self, min_interval, max_interval, request_budget):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.request_budget = request_budget
+        self.histograms = {}
+        self.rates = {}
+        self.total_rate = 0.0
+
+    # Loads user's history of online transitions from the CSV file in a single pass
+    def register(self, gamertag, csv_file_name):
+        histogram = self.histograms.setdefault(gamertag, [0] * HOURS_PER_WEEK)
+        if not csv_file_name or not os.path.isfile(csv_file_name):
+            return
+        try:
+            with open(csv_file_name, 'r', newline='', encoding="utf-8") as f:
+                status_old = "offline"
+                for row in csv.DictReader(f):
+                    status = row.get("Status", "")
+                    if status and status != "offline" and status_old == "offline":
+                        row_dt = parse_csv_date(row.get("Date", ""))
+                        if row_dt:
+                            histogram[row_dt.weekday() * 24 + row_dt.hour] += 1
+                    if status:
+                        status_old = status
+        except Exception as e:
+            print(f"* Cannot load activity history for adaptive polling from '{csv_file_name}' file: {e}")
+        debug_print(f"Adaptive polling: loaded {sum(histogram)} online transitions of {gamertag} from '{csv_file_name}'")
+
+    # Records online transition of the user observed at runtime
+    def record_online(self, gamertag, dt):
+        histogram = self.histograms.setdefault(gamertag, [0] * HOURS_PER_WEEK)
+        histogram[dt.weekday() * 24 + dt.hour] += 1
+
+    # Returns offline check interval for the current hour of the week
+    def offline_interval(self, gamertag, dt):
+        histogram = self.histograms.get(gamertag)
+        if not histogram:
+            return XBOX_CHECK_INTERVAL
+
+        # Smooth with neighbouring hours, so transitions a bit before/after the usual time still count
+        bucket = dt.weekday() * 24 + dt.hour
+        score = histogram[bucket] + 0.5 * (histogram[bucket - 1] + histogram[(bucket + 1) % HOURS_PER_WEEK])
+        mean_score = 2.0 * sum(histogram) / HOURS_PER_WEEK
+
+        # Ratio of this hour's activity to the average, small prior keeps the base interval when there is no history
+        ratio = (score + 0.1) / (mean_score + 0.1)
+
+        interval = XBOX_CHECK_INTERVAL / ratio
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    # Returns how long to wait before the next check of the user
+    def next_interval(self, gamertag, status):
+        if status and status != "offline":
+            interval = XBOX_ACTIVE_CHECK_INTERVAL
+        else:
+            interval = self.offline_interval(gamertag, now_local())
+        interval = max(interval, 1)
+
+        rate = 3600.0 / interval
+        self.total_rate += rate - self.rates.get(gamertag, 0.0)
+        self.rates[gamertag] = rate
+
+        if self.request_budget and self.total_rate > self.request_budget:
+            interval *= self.total_rate / self.request_budget
+
+        debug_print(f"Adaptive polling: next check of {gamertag} in {display_time(int(interval))} (total rate: {int(self.total_rate)} checks/hour)")
+        return int(interval)
+
+
+# Returns how long to wait before the next check of the user (adaptive if ADAPTIVE_POLLING is enabled)
+def get_check_interval(gamertag, status):
+    if poll_scheduler:
+        return poll_scheduler.next_interval(gamertag, status)
+    if status and status != "offline":
+        return XBOX_ACTIVE_CHECK_INTERVAL
+    return XBOX_CHECK_INTERVAL
+
+
+# Parses date written to the CSV file (local time without timezone info)
+def parse_csv_date(date_str):
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        try:
+            return isoparse(date_str)
+        except Exception:
+            return None
+
+
+# Returns the datetime object with LOCAL_TIMEZONE set if it has no timezone info
+def tz_localize_date(dt):
+    if dt.tzinfo is None:
+        return pytz.timezone(LOCAL_TIMEZONE).localize(dt)
+    return dt
 
 
 # Returns current local time without timezone info (naive)
@@ -851,40 +1894,86 @@ def reload_secrets_signal_handler(sig, frame):
     print_cur_ts("Timestamp:\t\t\t")
 
 
-# Returns mapping of platform code name to recognizable name
-def xbox_get_platform_mapping(platform, short=True):
+# Built-in registry of Xbox device types: (code names matched as part of the device type, short name, long name)
+# None as a name keeps the device type reported by Xbox Live as is
+# Public type names (XboxSeriesX, XboxOneS, XboxOne, Web...) are listed next to the console code names
+XBOX_DEVICE_REGISTRY_DEFAULT = (
+    (("scarlett", "anaconda", "starkville", "lockhart", "edith", "xboxseries"), "XSX", "Xbox One Series X/S"),
+    (("scorpio", "edmonton", "xboxonex", "xboxones"), "XONEX", "Xbox One X/S"),
+    (("durango", "xboxone"), "XONE", "Xbox One"),
+    (("xenon",), "X360", "Xbox 360"),
+    (("windows",), "Windows", "Windows"),  # WindowsOneCore
+    (("ios",), "iPhone/iPad", "iPhone/iPad"),
+    (("android",), None, "Android Phone/Tablet"),
+    (("web",), "Web", "Web"),
+)
+
+# Device registry in use (XBOX_DEVICE_TYPES entries followed by the built-in ones), see xbox_load_device_registry()
+xbox_device_registry = XBOX_DEVICE_REGISTRY_DEFAULT
+
+# Device types seen in presence but not found in the registry, reported at liveness checks
+xbox_unknown_device_types = set()
+
+
+# Builds the device registry from XBOX_DEVICE_TYPES followed by the built-in entries
+def xbox_load_device_registry():
+    global xbox_device_registry
+
+    custom_entries = []
+    for code_name, names in XBOX_DEVICE_TYPES.items():
+        short_name, long_name = names
+        custom_entries.append(((str(code_name).lower(),), short_name, long_name))
+
+    xbox_device_registry = tuple(custom_entries) + XBOX_DEVICE_REGISTRY_DEFAULT
+    xbox_find_device_names.cache_clear()
+    xbox_unknown_device_types.clear()
+
+
+# Returns (short name, long name) of Xbox device type from the device registry or None if unknown; memoised
+@lru_cache(maxsize=256)
+def xbox_find_device_names(platform):
     platform_lower = str(platform).lower()
-    if any(x in platform_lower for x in ["scarlett", "anaconda", "starkville", "lockhart", "edith"]):
-        if short:
-            platform = "XSX"
-        else:
-            platform = "Xbox One Series X/S"
-    elif any(x in platform_lower for x in ["scorpio", "edmonton"]):
-        if short:
-            platform = "XONEX"
-        else:
-            platform = "Xbox One X/S"
-    elif "durango" in str(platform).lower():
-        if short:
-            platform = "XONE"
-        else:
-            platform = "Xbox One"
-    elif "xenon" in str(platform).lower():
-        if short:
-            platform = "X360"
-        else:
-            platform = "Xbox 360"
-    elif "windows" in str(platform).lower():  # WindowsOneCore
-        platform = "Windows"
-    elif "ios" in str(platform).lower():
-        platform = "iPhone/iPad"
-    elif "android" in str(platform).lower():
-        if not short:
-            platform = "Android Phone/Tablet"
-    return platform
-
-
-# Processes Xbox presence class
+    for code_names, short_name, long_name in xbox_device_registry:
+        if any(code_name in platform_lower for code_name in code_names):
+            return short_name, long_name
+    return None
+
+
+# Maps Xbox device type to the platform name (short or long), unknown device types are kept as is
+def xbox_get_platform_mapping(platform, short=True):
+    names = xbox_find_device_names(platform)
+    if names is None:
+        if platform and platform not in xbox_unknown_device_types:
+            xbox_unknown_device_types.add(platform)
+            debug_print(f"Unknown Xbox device type '{platform}', you can add it to XBOX_DEVICE_TYPES")
+        return platform
+
+    name = names[0] if short else names[1]
+    return name if name is not None else platform
+
+
+# Presence record returned by xbox_process_presence_class() (a tuple, so it can still be unpacked)
+PresenceRecord = namedtuple("PresenceRecord", ["status", "title_name", "game_name", "platform", "lastonline_ts"])
+
+# Last seen title names which do not indicate any title, and device title names which are not games
+PRESENCE_NON_TITLE_NAMES = frozenset(("Online", "Home"))
+PRESENCE_NON_GAME_NAMES = frozenset(("Online", "Home", "Xbox App"))
+
+
+# Converts ISO datetime string (or datetime object) to Unix timestamp, naive values are treated as UTC; 0 if invalid
+def convert_iso_str_to_ts(dt_str):
+    if not dt_str:
+        return 0
+    try:
+        dt = dt_str if isinstance(dt_str, datetime) else isoparse(dt_str)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp())
+    except Exception:
+        return 0
+
+
+# Processes Xbox presence class, returns PresenceRecord (status, title_name, game_name, platform, lastonline_ts)
 def xbox_process_presence_class(presence, platform_short=True):
     status = ""
     title_name = ""
@@ -892,68 +1981,399 @@ def xbox_process_presence_class(presence, platform_short=True):
     platform = ""
     lastonline_ts = 0
 
-    if 'state' in dir(presence):
-        if presence.state:
-            status = str(presence.state).lower()
-
-    last_seen_class = ""
-    last_seen_raw_title = ""
-    last_seen_raw_ts = ""
-    last_seen_raw_device = ""
-    presence_titles_dbg = []
-
-    if 'last_seen' in dir(presence):
-        if presence.last_seen:
-            last_seen_class = presence.last_seen
-            last_seen_raw_title = getattr(last_seen_class, "title_name", "")
-            last_seen_raw_ts = getattr(last_seen_class, "timestamp", "")
-            last_seen_raw_device = getattr(last_seen_class, "device_type", "")
-            if 'title_name' in dir(last_seen_class):
-                if last_seen_class.title_name:
-                    if last_seen_class.title_name not in ("Online", "Home"):
-                        title_name = last_seen_class.title_name
-            if 'device_type' in dir(last_seen_class):
-                if last_seen_class.device_type:
-                    platform = last_seen_class.device_type
-                    platform = xbox_get_platform_mapping(platform, platform_short)
-            if 'timestamp' in dir(last_seen_class):
-                if last_seen_class.timestamp:
-                    lastonline_dt = convert_iso_str_to_datetime(last_seen_class.timestamp)
-                    if lastonline_dt:
-                        lastonline_ts = int(lastonline_dt.timestamp())
-                    else:
-                        lastonline_ts = 0
-        elif 'type' in dir(presence):
-            dev_type = presence.type
-            platform = xbox_get_platform_mapping(dev_type, platform_short)
-
-    if 'devices' in dir(presence):
-        if presence.devices:
-            devices_class = presence.devices
+    state = getattr(presence, "state", None)
+    if state:
+        status = str(state).lower()
+
+    last_seen = getattr(presence, "last_seen", None)
+    if last_seen:
+        if last_seen.title_name and last_seen.title_name not in PRESENCE_NON_TITLE_NAMES:
+            title_name = last_seen.title_name
+        if last_seen.device_type:
+            platform = xbox_get_platform_mapping(last_seen.device_type, platform_short)
+        if last_seen.timestamp:
+            lastonline_ts = convert_iso_str_to_ts(last_seen.timestamp)
+    elif getattr(presence, "type", None) is not None:
+        platform = xbox_get_platform_mapping(presence.type, platform_short)
+
+    devices = getattr(presence, "devices", None)
+    titles = ()
+    if devices:
+        device = devices[0]
+        platform = xbox_get_platform_mapping(device.type, platform_short)
+        titles = getattr(device, "titles", None) or ()
+        for title in titles:
+            if title.name not in PRESENCE_NON_GAME_NAMES and title.placement != "Background":
+                game_name = title.name
+                break
+
+    record = PresenceRecord(status, title_name, game_name, platform, lastonline_ts)
+    if DEBUG_MODE:
+        presence_titles_dbg = [f"{title.name} [{title.placement}]" for title in titles if title.name]
+        debug_print_presence(record, getattr(last_seen, 'title_name', ''), getattr(last_seen, 'device_type', ''), getattr(last_seen, 'timestamp', ''), presence_titles_dbg)
+    return record
+
+
+# Processes raw presence JSON (PRESENCE_FAST_PATH), returns the same PresenceRecord as xbox_process_presence_class()
+def xbox_process_presence_json(presence, platform_short=True):
+    status = ""
+    title_name = ""
+    game_name = ""
+    platform = ""
+    lastonline_ts = 0
+
+    state = presence.get("state")
+    if state:
+        status = str(state).lower()
+
+    last_seen = presence.get("lastSeen") or {}
+    if last_seen:
+        last_seen_title = last_seen.get("titleName")
+        if last_seen_title and last_seen_title not in PRESENCE_NON_TITLE_NAMES:
+            title_name = last_seen_title
+        if last_seen.get("deviceType"):
+            platform = xbox_get_platform_mapping(last_seen["deviceType"], platform_short)
+        if last_seen.get("timestamp"):
+            lastonline_ts = convert_iso_str_to_ts(last_seen["timestamp"])
+
+    devices = presence.get("devices")
+    titles = ()
+    if devices:
+        device = devices[0]
+        platform = xbox_get_platform_mapping(device.get("type"), platform_short)
+        titles = device.get("titles") or ()
+        for title in titles:
+            if title.get("name") not in PRESENCE_NON_GAME_NAMES and title.get("placement") != "Background":
+                game_name = title.get("name")
+                break
+
+    record = PresenceRecord(status, title_name, game_name, platform, lastonline_ts)
+    if DEBUG_MODE:
+        presence_titles_dbg = [f"{title['name']} [{title.get('placement')}]" for title in titles if title.get("name")]
+        debug_print_presence(record, last_seen.get("titleName", ""), last_seen.get("deviceType", ""), last_seen.get("timestamp", ""), presence_titles_dbg)
+    return record
+
+
+# Processes presence returned by xbox_get_presence() (python-xbox model or raw JSON dict if PRESENCE_FAST_PATH is enabled)
+def xbox_process_presence(presence, platform_short=True):
+    if isinstance(presence, dict):
+        return xbox_process_presence_json(presence, platform_short)
+    return xbox_process_presence_class(presence, platform_short)
+
+
+# Prints decoded presence record and the raw values it was decoded from (debug mode)
+def debug_print_presence(record, last_seen_title, last_seen_device, last_seen_ts, presence_titles_dbg):
+    debug_print(f"Presence data: state={record.status}, title_name={record.title_name}, game_name={record.game_name}, platform={record.platform}, lastonline={get_debug_date_from_ts(record.lastonline_ts)}")
+    debug_print(f"Presence raw: last_seen_title={last_seen_title}, last_seen_device={last_seen_device}, last_seen_timestamp={last_seen_ts}")
+    debug_print(f"Presence device titles: {', '.join(presence_titles_dbg) if presence_titles_dbg else 'none'}")
+
+
+# Mapping of profile setting IDs to keys of the profile settings dict
+PROFILE_SETTINGS_KEYS = {
+    "Location": "location",
+    "Bio": "bio",
+    "RealNameOverride": "realname",
+    "Gamerscore": "gamerscore",
+    "AccountTier": "tier",
+    "GameDisplayPicRaw": "avatar",
+}
+
+# Profile setting IDs used only when the setting above is missing (batch profile endpoint returns RealName)
+PROFILE_SETTINGS_FALLBACK_KEYS = {
+    "RealName": "realname",
+}
+
+
+# Extracts profile settings (location, bio, real name etc.) from profile user object in one pass
+def xbox_get_profile_settings(user_obj):
+    settings = {key: "" for key in PROFILE_SETTINGS_KEYS.values()}
+    settings["gamerscore"] = "0"
+    fallback_settings = {}
+    for setting in user_obj.settings:
+        key = PROFILE_SETTINGS_KEYS.get(setting.id)
+        if key and setting.value:
+            settings[key] = setting.value
+        elif setting.id in PROFILE_SETTINGS_FALLBACK_KEYS and setting.value:
+            fallback_settings[PROFILE_SETTINGS_FALLBACK_KEYS[setting.id]] = setting.value
+    for key, value in fallback_settings.items():
+        if not settings[key]:
+            settings[key] = value
+    return settings
+
+
+# Fetches profile of the user by gamer tag, returns dict with XUID and profile settings (None if not found)
+async def xbox_get_profile_by_gamertag(xbl_client, gamertag):
+    profile = await xbl_request("profile", xbl_client.profile.get_profile_by_gamertag, gamertag)
+    if not profile.profile_users:
+        return None
+    user_obj = profile.profile_users[0]
+    return {"xuid": int(user_obj.id), "gamertag": gamertag, "settings": xbox_get_profile_settings(user_obj)}
+
+
+# Persistent gamer tag -> XUID & profile settings cache stored in JSON file
+class XboxXuidCache:
+    def __init__(self, file_name, ttl):
+        self.file_name = file_name
+        self.ttl = ttl
+        self.entries = {}
+        self.refresh_tasks = {}
+        self.dirty = False  # entries refreshed in the background, not saved yet
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.file_name):
+            return
+        try:
+            with open(self.file_name, 'r', encoding="utf-8") as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self.entries = entries
+        except Exception as e:
+            print(f"* Cannot load XUID cache from '{self.file_name}' file: {e}")
+
+    def save(self):
+        self.dirty = False
+        tmp_file_name = f"{self.file_name}.tmp"
+        try:
+            with open(tmp_file_name, 'w', encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_file_name, self.file_name)
+        except Exception as e:
+            print(f"* Cannot save XUID cache to '{self.file_name}' file: {e}")
+
+    def get(self, gamertag):
+        return self.entries.get(gamertag.lower())
+
+    def put(self, gamertag, user_profile, save=True):
+        entry = dict(user_profile)
+        entry["ts"] = int(time.time())
+        self.entries[gamertag.lower()] = entry
+        if save:
+            self.save()
+
+    def is_fresh(self, entry):
+        return (time.time() - entry.get("ts", 0)) < self.ttl
+
+    # Schedules background refresh of the cached entry (once per gamer tag)
+    def revalidate(self, xbl_client, gamertag):
+        key = gamertag.lower()
+        if key not in self.refresh_tasks:
+            self.refresh_tasks[key] = asyncio.get_running_loop().create_task(self.refresh(xbl_client, gamertag))
+
+    async def refresh(self, xbl_client, gamertag):
+        try:
+            old_entry = self.get(gamertag)
+            user_profile = await xbox_get_profile_by_gamertag(xbl_client, gamertag)
+            if user_profile:
+                if old_entry and old_entry.get("xuid") != user_profile["xuid"]:
+                    print(f"* Warning: Xbox gamer tag {gamertag} now belongs to XUID {user_profile['xuid']} (was {old_entry.get('xuid')}), restart the tool to use it")
+                self.put(gamertag, user_profile, save=False)
+                self.dirty = True
+                debug_print(f"Cached XUID for {gamertag} refreshed in the background")
+        except Exception as e:
+            debug_print(f"Background refresh of cached XUID for {gamertag} failed: {e}")
+        finally:
+            self.refresh_tasks.pop(gamertag.lower(), None)
+            # Save the cache once all pending background refreshes are finished
+            if self.dirty and not self.refresh_tasks:
+                self.save()
+
+
+# Returns the gamer tag -> XUID cache (None if disabled)
+def get_xuid_cache():
+    global xuid_cache
+    if xuid_cache is None and XUID_CACHE_FILE:
+        cache_file = os.path.expanduser(XUID_CACHE_FILE)
+        if not os.path.dirname(cache_file) and MS_AUTH_TOKENS_FILE:
+            cache_file = os.path.join(os.path.dirname(MS_AUTH_TOKENS_FILE), cache_file)
+        xuid_cache = XboxXuidCache(cache_file, XUID_CACHE_TTL)
+    return xuid_cache
+
+
+# Resolves gamer tag to dict with XUID and profile settings
+# With use_cache, cached entries are returned right away (expired ones are refreshed in the background),
+# otherwise the profile is always fetched and the cache updated
+async def xbox_resolve_profile(xbl_client, gamertag, use_cache=True):
+    cache = get_xuid_cache()
+    entry = cache.get(gamertag) if cache and use_cache else None
+    if entry:
+        if cache.is_fresh(entry):
+            debug_print(f"Using cached XUID for {gamertag}: {entry['xuid']}")
+        else:
+            debug_print(f"Using expired cached XUID for {gamertag}: {entry['xuid']}, refreshing it in the background")
+            cache.revalidate(xbl_client, gamertag)
+        return entry
+
+    user_profile = await xbox_get_profile_by_gamertag(xbl_client, gamertag)
+    if user_profile and cache:
+        cache.put(gamertag, user_profile)
+    return user_profile
+
+
+# Resolves profiles of many gamer tags at once, returns dict of gamer tag -> dict with XUID and profile settings
+# Settings of users with already known (cached) XUIDs are fetched via the batch profile endpoint, unknown gamer tags
+# are looked up concurrently (bounded by XBOX_API_MAX_CONCURRENCY); gamer tags which cannot be resolved are left out
+async def xbox_resolve_profiles(xbl_client, gamertags):
+    cache = get_xuid_cache()
+    user_profiles = {}
+    unknown_gamertags = []
+    known_entries = {}
+
+    for gamertag in gamertags:
+        entry = cache.get(gamertag) if cache else None
+        if entry:
+            known_entries[str(entry["xuid"])] = (gamertag, entry)
+        else:
+            unknown_gamertags.append(gamertag)
+
+    xuids = list(known_entries)
+    for i in range(0, len(xuids), PROFILE_BATCH_MAX_XUIDS):
+        chunk = xuids[i:i + PROFILE_BATCH_MAX_XUIDS]
+        try:
+            profile = await xbl_request("profile_batch", xbl_client.profile.get_profiles, chunk)
+            profile_users = {str(user_obj.id): user_obj for user_obj in (profile.profile_users or [])}
+        except Exception as e:
+            # Keep using cached settings, they are refreshed on the next start
+            debug_print(f"Batch profile fetch for {len(chunk)} users failed, using cached data: {e}")
+            for xuid in chunk:
+                gamertag, entry = known_entries[xuid]
+                user_profiles[gamertag] = entry
+            continue
+
+        for xuid in chunk:
+            gamertag, entry = known_entries[xuid]
+            user_obj = profile_users.get(xuid)
+            if user_obj is None:
+                unknown_gamertags.append(gamertag)
+                continue
+            user_profiles[gamertag] = {"xuid": int(xuid), "gamertag": gamertag, "settings": xbox_get_profile_settings(user_obj)}
+            if cache:
+                cache.put(gamertag, user_profiles[gamertag], save=False)
+
+    if unknown_gamertags:
+        semaphore = asyncio.Semaphore(max(1, XBOX_API_MAX_CONCURRENCY))
+        results = await asyncio.gather(*(run_with_semaphore(semaphore, xbox_get_profile_by_gamertag(xbl_client, gamertag)) for gamertag in unknown_gamertags), return_exceptions=True)
+        for gamertag, user_profile in zip(unknown_gamertags, results):
+            if isinstance(user_profile, Exception) or not user_profile:
+                debug_print(f"Cannot resolve profile for {gamertag}: {user_profile}")
+                continue
+            user_profiles[gamertag] = user_profile
+            if cache:
+                cache.put(gamertag, user_profile, save=False)
+
+    if cache:
+        cache.save()
+
+    return user_profiles
+
+
+# Collects presence requests of monitored users and fetches them via the multi-XUID presence batch endpoint,
+# results are then fanned out to the waiting monitoring loops
+class XboxPresenceBatcher:
+    def __init__(self, xbl_client, batch_window=5):
+        self.xbl_client = xbl_client
+        self.batch_window = batch_window
+        self.pending = {}
+        self.flush_task = None
+        self.flush_tasks = set()  # immediate flushes of full batches, referenced until done so they are not GC'ed
+
+    # Queues presence request for XUID and waits until the batch containing it is fetched
+    async def get_presence(self, xuid):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.setdefault(str(xuid), []).append(future)
+
+        if len(self.pending) >= PRESENCE_BATCH_MAX_XUIDS:
+            flush_task = loop.create_task(self.flush())
+            self.flush_tasks.add(flush_task)
+            flush_task.add_done_callback(self.flush_tasks.discard)
+        elif self.flush_task is None:
+            self.flush_task = loop.create_task(self.flush_later())
+
+        return await future
+
+    async def flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        self.flush_task = None
+        await self.flush()
+
+    # Fetches all pending XUIDs in batches and resolves the waiting requests
+    async def flush(self):
+        pending, self.pending = self.pending, {}
+        xuids = list(pending)
+
+        for i in range(0, len(xuids), PRESENCE_BATCH_MAX_XUIDS):
+            chunk = xuids[i:i + PRESENCE_BATCH_MAX_XUIDS]
+            debug_print(f"Fetching presence batch for {len(chunk)} users...")
             try:
-                platform = devices_class[0].type
-                platform = xbox_get_platform_mapping(platform, platform_short)
-            except IndexError:
-                pass
-            if 'titles' in dir(devices_class[0]):
-                titles_class = devices_class[0].titles
-                for title in titles_class:
-                    t_name = getattr(title, "name", "")
-                    t_placement = getattr(title, "placement", "")
-                    if t_name:
-                        presence_titles_dbg.append(f"{t_name} [{t_placement}]")
-                    if title.name not in ("Online", "Home", "Xbox App") and title.placement != "Background":
-                        game_name = title.name
-                        break
-
-    debug_print(f"Presence data: state={status}, title_name={title_name}, game_name={game_name}, platform={platform}, lastonline={get_debug_date_from_ts(lastonline_ts)}")
-    debug_print(f"Presence raw: last_seen_title={last_seen_raw_title}, last_seen_device={last_seen_raw_device}, last_seen_timestamp={last_seen_raw_ts}")
-    if presence_titles_dbg:
-        debug_print(f"Presence device titles: {', '.join(presence_titles_dbg)}")
-    else:
-        debug_print("Presence device titles: none")
+                if PRESENCE_FAST_PATH:
+                    presence_items = await xbox_get_presence_batch_raw(self.xbl_client, chunk)
+                else:
+                    presence_items = await xbl_request("presence_batch", self.xbl_client.presence.get_presence_batch, chunk, presence_level=PresenceLevel.ALL)
+            except Exception as e:
+                for xuid in chunk:
+                    for future in pending[xuid]:
+                        if not future.done():
+                            future.set_exception(e)
+                continue
+
+            if PRESENCE_FAST_PATH:
+                presence_by_xuid = {str(item.get("xuid")): item for item in presence_items}
+            else:
+                presence_by_xuid = {str(item.xuid): item for item in presence_items}
+            for xuid in chunk:
+                presence = presence_by_xuid.get(xuid)
+                for future in pending[xuid]:
+                    if future.done():
+                        continue
+                    if presence is None:
+                        future.set_exception(ValueError(f"No presence returned for XUID {xuid}"))
+                    else:
+                        future.set_result(presence)
+
+
+# Gets presence of the user, via the batcher in multi-user mode
+# Returns python-xbox PresenceItem or raw JSON dict if PRESENCE_FAST_PATH is enabled, decode it with xbox_process_presence()
+async def xbox_get_presence(xbl_client, xuid, presence_batcher=None):
+    if presence_batcher:
+        return await presence_batcher.get_presence(xuid)
+    if PRESENCE_FAST_PATH:
+        return await xbox_get_presence_raw(xbl_client, xuid)
+    return await xbl_request("presence", xbl_client.presence.get_presence, str(xuid), PresenceLevel.ALL)
+
+
+# Parses JSON response body, uses orjson if available
+def json_loads(data):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Fetches presence of the user as raw JSON over the signed session, bypassing python-xbox model validation
+async def xbox_get_presence_raw(xbl_client, xuid):
+    presence_provider = xbl_client.presence
+    url = f"{presence_provider.PRESENCE_URL}/users/xuid({xuid})?level={PresenceLevel.ALL.value}"
+
+    async def get_presence():
+        response = await xbl_client.session.get(url, headers=presence_provider.HEADERS_PRESENCE)
+        response.raise_for_status()
+        return json_loads(response.content)
+
+    return await xbl_request("presence", get_presence)
+
 
-    return status, title_name, game_name, platform, lastonline_ts
+# Fetches presence of the users (up to PRESENCE_BATCH_MAX_XUIDS) as raw JSON list over the signed session
+async def xbox_get_presence_batch_raw(xbl_client, xuids):
+    presence_provider = xbl_client.presence
+    url = f"{presence_provider.PRESENCE_URL}/users/batch"
+    post_data = {"users": [str(x) for x in xuids], "onlineOnly": False, "level": PresenceLevel.ALL.value}
+
+    async def get_presence_batch():
+        response = await xbl_client.session.post(url, json=post_data, headers=presence_provider.HEADERS_PRESENCE)
+        response.raise_for_status()
+        return json_loads(response.content)
+
+    return await xbl_request("presence_batch", get_presence_batch)
 
 
 # Fetches the most recent last time played timestamp and game_name from title history
@@ -962,33 +2382,85 @@ def xbox_process_presence_class(presence, platform_short=True):
 async def xbox_get_latest_title_played_ts(xbl_client, xuid):
     try:
         # Fetch 3 items to be safe (sometimes the first one is weird or missing timestamp)
-        history_response = await xbl_client.titlehub.get_title_history(
-            xuid,
-            max_items=3
-        )
-        if history_response.titles:
-            debug_print(f"Fetched {len(history_response.titles)} history items:")
-            best_ts = 0
-            best_game = ""
-            for i, title in enumerate(history_response.titles, 1):
-                if title.title_history and title.title_history.last_time_played:
-                    played_dt = convert_iso_str_to_datetime(title.title_history.last_time_played)
-                    if played_dt:
-                        ts = int(played_dt.timestamp())
-                        game_name = title.name if hasattr(title, 'name') and title.name else "Unknown"
-                        debug_print(f"  {i}. {game_name} played at {get_date_from_ts(ts)}")
-                        if best_ts == 0:
-                            best_ts = ts
-                            best_game = game_name
-
-            if best_ts > 0:
-                debug_print(f"Selected title history: {best_game} at {get_date_from_ts(best_ts)}")
-            return best_ts, best_game
+        history_response = await xbl_request("titlehub", xbl_client.titlehub.get_title_history, xuid, max_items=3)
+        return xbox_get_latest_title_from_history(history_response.titles)
     except Exception as e:
         debug_print(f"Error in xbox_get_latest_title_played_ts: {e}")
     return 0, ""
 
 
+# Returns the most recent last time played timestamp and game_name from the title history items
+def xbox_get_latest_title_from_history(titles):
+    if not titles:
+        return 0, ""
+    debug_print(f"Fetched {len(titles)} history items:")
+    best_ts = 0
+    best_game = ""
+    for i, title in enumerate(titles, 1):
+        if title.title_history and title.title_history.last_time_played:
+            played_dt = convert_iso_str_to_datetime(title.title_history.last_time_played)
+            if played_dt:
+                ts = int(played_dt.timestamp())
+                game_name = title.name if hasattr(title, 'name') and title.name else "Unknown"
+                debug_print(f"  {i}. {game_name} played at {get_date_from_ts(ts)}")
+                if best_ts == 0:
+                    best_ts = ts
+                    best_game = game_name
+
+    if best_ts > 0:
+        debug_print(f"Selected title history: {best_game} at {get_date_from_ts(best_ts)}")
+    return best_ts, best_game
+
+
+# Samples the latest title history entry of the offline user at its own (slower) cadence using conditional requests
+# (If-None-Match), so "appear offline" detection does not double the number of API calls of every offline poll
+class XboxTitleHistoryPoller:
+    def __init__(self, xbl_client, xuid, check_interval):
+        self.xbl_client = xbl_client
+        self.xuid = xuid
+        self.check_interval = check_interval
+        self.etag = None
+        self.latest = (0, "")
+        self.fetched_ts = 0
+
+    # Sets the already fetched title history (e.g. at startup) as the current one
+    def seed(self, title_history_ts, title_history_game):
+        self.latest = (title_history_ts, title_history_game)
+        self.fetched_ts = int(time.time())
+
+    # Returns the latest title played timestamp and game_name, fetched only if forced or check interval has passed
+    async def get(self, force=False):
+        if not force and self.fetched_ts and (int(time.time()) - self.fetched_ts) < self.check_interval:
+            debug_print(f"Title history check skipped, next one in {display_time(self.check_interval - (int(time.time()) - self.fetched_ts))}")
+            return self.latest
+        try:
+            response = await xbl_request("titlehub", self.fetch)
+            self.fetched_ts = int(time.time())
+            if response is None:
+                debug_print("Title history not modified (HTTP 304)")
+                return self.latest
+            self.etag = response.headers.get("ETag")
+            history_response = TitleHubResponse.model_validate_json(response.text)
+            self.latest = xbox_get_latest_title_from_history(history_response.titles)
+        except Exception as e:
+            debug_print(f"Error in XboxTitleHistoryPoller.get: {e}")
+        return self.latest
+
+    # Sends the conditional title history request, returns None if title history has not been modified
+    async def fetch(self):
+        titlehub = self.xbl_client.titlehub
+        fields = ",".join([TitleFields.ACHIEVEMENT, TitleFields.IMAGE, TitleFields.SERVICE_CONFIG_ID])
+        url = f"{titlehub.TITLEHUB_URL}/users/xuid({self.xuid})/titles/titlehistory/decoration/{fields}"
+        headers = dict(getattr(titlehub, "_headers", {"x-xbl-contract-version": "2"}))
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        response = await self.xbl_client.session.get(url, params={"maxItems": 3}, headers=headers)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response
+
+
 # Selects the best available last online timestamp (presence vs title history)
 def xbox_get_best_lastonline_ts(lastonline_ts, title_history_ts):
     # Only use title history if it's significantly newer (20s jitter buffer) OR presence is missing (0)
@@ -999,100 +2471,28 @@ def xbox_get_best_lastonline_ts(lastonline_ts, title_history_ts):
     return lastonline_ts, False
 
 
-# Gets detailed user information and displays it (for -i/--info mode)
-async def get_user_info(gamertag, client=None, show_friends=False, show_recent_achievements=False, show_recent_games=False, achievements_count=5, games_count=10):
-
-    # Helper to print step message
-    def print_step(msg):
-        global STDOUT_AT_START_OF_LINE
-        sys.stdout.write(f"- {msg}".ljust(32))
-        sys.stdout.flush()
-        STDOUT_AT_START_OF_LINE = False
-
-    # Helper to print OK
-    def print_ok():
-        global STDOUT_AT_START_OF_LINE
-        print("OK")
-        STDOUT_AT_START_OF_LINE = True
-
-    if not client:
-        print(f"* Fetching details for Xbox user '{gamertag}'...\n")
-
-    session = None
-
-    if not client:
-        print_step("Authenticating with Xbox...")
-        try:
-            session = SignedSession()
-            auth_mgr = AuthenticationManager(session, MS_APP_CLIENT_ID, MS_APP_CLIENT_SECRET, "")
-            await authenticate_and_refresh_tokens(auth_mgr)
-
-            xbl_client = XboxLiveClient(auth_mgr)
-        except Exception as e:
-            print(f"\n* Error: {e}")
-            if session:
-                await session.aclose()
-            sys.exit(1)
-        print_ok()
-    else:
-        xbl_client = client
-
-    print_step("Fetching profile info...")
-    try:
-        profile = await xbl_client.profile.get_profile_by_gamertag(gamertag)
-        if not profile.profile_users:
-            print(f"\n* Error: Cannot get profile for user {gamertag}")
-            if session:
-                await session.aclose()
-            sys.exit(1)
-
-        user_obj = profile.profile_users[0]
-        xuid = user_obj.id
-
-        # Extract settings
-        location = next((x.value for x in user_obj.settings if x.id == "Location"), "")
-        bio = next((x.value for x in user_obj.settings if x.id == "Bio"), "")
-        realname = next((x.value for x in user_obj.settings if x.id == "RealNameOverride"), "")
-        gamerscore = next((x.value for x in user_obj.settings if x.id == "Gamerscore"), "0")
-        tier = next((x.value for x in user_obj.settings if x.id == "AccountTier"), "")
-        avatar = next((x.value for x in user_obj.settings if x.id == "GameDisplayPicRaw"), "")
+# Awaits the coroutine once the semaphore allows it (used to bound the number of concurrent API requests)
+async def run_with_semaphore(semaphore, coro):
+    async with semaphore:
+        return await coro
 
-    except Exception as e:
-        print(f"\n* Error: {e}")
-        if session:
-            await session.aclose()
-        sys.exit(1)
-    debug_print(f"Profile fetched: XUID={xuid}, Gamerscore={gamerscore}, Tier={tier}")
-    print_ok()
 
-    print_step("Fetching presence info...")
-    try:
-        presence = await xbl_client.presence.get_presence(str(xuid), PresenceLevel.ALL)
-        status, title_name, game_name, platform, lastonline_ts = xbox_process_presence_class(presence, False)
-    except Exception as e:
-        print(f"\n* Error: Cannot get presence for user {gamertag}: {e}")
-        if session:
-            await session.aclose()
-        sys.exit(1)
-    print_ok()
+# Cancels the pending tasks and waits for them to finish
+async def cancel_tasks(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
-    # Fetch title history timestamp as fallback for "appear offline" users
-    lastonline_source_history = False
-    if status.lower() == "offline":
-        print_step("Checking title history...")
-        title_history_ts, _ = await xbox_get_latest_title_played_ts(xbl_client, xuid)
-        lastonline_ts, lastonline_source_history = xbox_get_best_lastonline_ts(lastonline_ts, title_history_ts)
-        print_ok()
 
-    # Friends
-    # Try library method first (works with fixed python-xbox), then fallback to direct API (for unfixed library)
+# Fetches friends of the user, returns friends count and list
+# Tries library method first (works with fixed python-xbox), then falls back to direct API (for unfixed library)
+async def xbox_get_friends(xbl_client, xuid):
     friends_count = 0
     friends_list = []
-    print_step("Fetching friends info...")
 
     # First, try using the library's method (works if using fixed python-xbox library)
     try:
-        friends_response = await xbl_client.people.get_friends_by_xuid(str(xuid))
+        friends_response = await xbl_request("people", xbl_client.people.get_friends_by_xuid, str(xuid))
         if friends_response.people:
             friends_list_raw = friends_response.people
             # Filter out the target user's own profile if it appears
@@ -1145,46 +2545,272 @@ async def get_user_info(gamertag, client=None, show_friends=False, show_recent_a
         debug_print(f"Library method failed or unfixed: {e}")
         # Fallback to direct API call (works with unfixed library)
         try:
-            peoplehub_url = "https://peoplehub.xboxlive.com"
-            decoration = "presenceDetail,preferredColor,detail"
-            url = f"{peoplehub_url}/users/xuid({xuid})/people/social/decoration/{decoration}"
-            headers = {
-                "x-xbl-contract-version": "5",
-                "Accept-Language": "en-US",
-            }
+            peoplehub_url = "https://peoplehub.xboxlive.com"
+            decoration = "presenceDetail,preferredColor,detail"
+            url = f"{peoplehub_url}/users/xuid({xuid})/people/social/decoration/{decoration}"
+            headers = {
+                "x-xbl-contract-version": "5",
+                "Accept-Language": "en-US",
+            }
+
+            # Try to get the session from the XboxLiveClient
+            http_session = None
+            if hasattr(xbl_client, 'session'):
+                http_session = getattr(xbl_client, 'session')
+            elif hasattr(xbl_client, '_session'):
+                http_session = getattr(xbl_client, '_session')
+            elif hasattr(xbl_client, '_auth_mgr'):
+                auth_mgr = getattr(xbl_client, '_auth_mgr')
+                if hasattr(auth_mgr, 'session'):
+                    http_session = getattr(auth_mgr, 'session')
+
+            if http_session:
+                async def get_people():
+                    response = await http_session.get(url, headers=headers)
+                    response.raise_for_status()
+                    return response
+
+                response = await xbl_request("people", get_people)
+                friends_data = response.json()
+
+                if 'people' in friends_data:
+                    friends_list_raw = friends_data['people']
+                    friends_list = [f for f in friends_list_raw if str(f.get('xuid', '')) != str(xuid)]
+                    friends_count = len(friends_list)
+                    debug_print(f"Friends fetched via direct API: {friends_count}")
+            else:
+                debug_print("Could not find HTTP session for direct API call")
+                # Last fallback - get count from summary
+                friends_summary = await xbl_request("people", xbl_client.people.get_friends_summary_by_xuid, str(xuid))
+                if hasattr(friends_summary, 'target_following_count'):
+                    friends_count = friends_summary.target_following_count
+                    debug_print(f"Friends count from summary: {friends_count}")
+
+        except Exception as e2:
+            debug_print(f"Direct API and summary fallbacks failed: {e2}")
+            raise
+
+    return friends_count, friends_list
+
+
+# Fetches title history (recently played games) including ServiceConfigId (needed for stats) and Image
+async def xbox_get_title_history(xbl_client, xuid, max_items):
+    history_response = await xbl_request(
+        "titlehub",
+        xbl_client.titlehub.get_title_history,
+        xuid,
+        fields=[TitleFields.ACHIEVEMENT, TitleFields.SERVICE_CONFIG_ID, TitleFields.IMAGE],
+        max_items=max_items
+    )
+    if history_response.titles:
+        return history_response.titles[:]
+    return []
+
+
+# Fetches recently unlocked achievements of the user (fast feed)
+async def xbox_get_recent_achievements(xbl_client, xuid):
+    ach_response = await xbl_request("achievements", xbl_client.achievements.get_achievements_xboxone_recent_progress_and_info, xuid)
+    if hasattr(ach_response, 'achievements'):
+        return getattr(ach_response, 'achievements')
+    # Sometimes it might return a list directly (rare but possible in some lib versions)
+    elif isinstance(ach_response, list):
+        return ach_response
+    return []
+
+
+# Fetches minutes played for the titles concurrently (bounded by semaphore), returns dict of title ID -> minutes
+async def xbox_get_playtimes(xbl_client, xuid, titles, semaphore):
+
+    async def get_minutes_played(title):
+        stats = await run_with_semaphore(semaphore, xbl_request("userstats", xbl_client.userstats.get_stats, xuid, title.service_config_id, cast(List[GeneralStatsField], [GeneralStatsField.MINUTES_PLAYED])))
+        mins = 0
+
+        stat_list_scid = getattr(stats, 'stat_list_scid', None)
+        statlistscollection = getattr(stats, 'statlistscollection', None)
+
+        if stat_list_scid:
+            mins = next((s.value for s in stat_list_scid[0].stats if s.name == "MinutesPlayed"), 0)
+        elif statlistscollection:
+            mins = next((s.value for s in statlistscollection[0].stats if s.name == "MinutesPlayed"), 0)
+        return int(mins or 0)
+
+    titles_with_scid = [title for title in titles if title.service_config_id]
+    results = await asyncio.gather(*(get_minutes_played(title) for title in titles_with_scid), return_exceptions=True)
+
+    playtimes = {}
+    for title, mins in zip(titles_with_scid, results):
+        if isinstance(mins, Exception):
+            debug_print(f"Could not fetch playtime for '{title.name}': {mins}")
+            continue
+        playtimes[title.title_id] = mins
+    return playtimes
+
+
+# Returns last played timestamp of the title from title history (0 if unknown)
+def xbox_get_title_last_played_ts(title):
+    if title.title_history and title.title_history.last_time_played:
+        played_dt = convert_iso_str_to_datetime(title.title_history.last_time_played)
+        if played_dt:
+            return int(played_dt.timestamp())
+    return 0
+
+
+# Scans the titles for unlocked achievements (Method 2 - Deep Scan) and returns the most recent ones
+# as a list of (achievement, title name) tuples sorted by unlock time (descending)
+# Titles are scanned concurrently from the most recently played one, only the top achievements_count
+# are kept in a heap and scanning stops once the remaining titles were last played before the oldest kept unlock
+async def xbox_get_latest_achievements(xbl_client, xuid, titles, achievements_count, semaphore):
+
+    async def get_unlocked_achievements(title):
+        game_achievements = await run_with_semaphore(semaphore, xbl_request("achievements", xbl_client.achievements.get_achievements_xboxone_gameprogress, xuid, title.title_id))
+        debug_print(f"Fetching detailed achievements for '{title.name}'...")
+
+        ach_list = []
+        if isinstance(game_achievements, list):
+            ach_list = game_achievements
+        elif hasattr(game_achievements, 'achievements'):
+            ach_list = game_achievements.achievements
+
+        unlocked_achs = [a for a in ach_list if a.progress_state == "Achieved"]
+        if unlocked_achs:
+            debug_print(f"  > Found {len(unlocked_achs)} unlocked achievements")
+        return unlocked_achs
+
+    if achievements_count <= 0:
+        return []
+
+    # Titles with unknown last played time are scanned first as they cannot be ruled out
+    ordered_titles = sorted(titles, key=lambda t: xbox_get_title_last_played_ts(t) or float("inf"), reverse=True)
+    wave_size = max(1, XBOX_API_MAX_CONCURRENCY)
+
+    heap = []
+    seq = 0
+    for i in range(0, len(ordered_titles), wave_size):
+        wave = ordered_titles[i:i + wave_size]
+
+        # Last played time is only updated when a session starts, so leave a margin for unlocks later in that session
+        played_ts = xbox_get_title_last_played_ts(wave[0])
+        if len(heap) >= achievements_count and played_ts and played_ts + ACHIEVEMENTS_SCAN_SESSION_MARGIN < heap[0][0]:
+            debug_print(f"Method 2 (Deep Scan) - Skipping {len(ordered_titles) - i} older titles")
+            break
+
+        results = await asyncio.gather(*(get_unlocked_achievements(title) for title in wave), return_exceptions=True)
+
+        for title, unlocked_achs in zip(wave, results):
+            if isinstance(unlocked_achs, Exception):
+                continue
+            for ach in unlocked_achs:
+                unlock_dt = convert_iso_str_to_datetime(ach.progression.time_unlocked) if getattr(ach, 'progression', None) else None
+                unlock_ts = unlock_dt.timestamp() if unlock_dt else 0
+                # Store with title name since we cannot modify the model, seq prevents comparing the models
+                item = (unlock_ts, seq, ach, title.name)
+                seq += 1
+                if len(heap) < achievements_count:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+    return [(ach, title_name) for _, _, ach, title_name in sorted(heap, reverse=True)]
+
+
+# Gets detailed user information and displays it (for -i/--info mode and monitoring startup)
+# Returns dict with XUID, profile settings, presence tuple (as returned by xbox_process_presence_class) and title history baseline,
+# title history is fetched when the user is offline or fetch_title_history is set
+# With use_xuid_cache the profile is taken from the gamer tag -> XUID cache when available
+# user_profile (if passed) is the already resolved profile (see xbox_resolve_profiles()), so it is not fetched again
+async def get_user_info(gamertag, client=None, show_friends=False, show_recent_achievements=False, show_recent_games=False, achievements_count=5, games_count=10, fetch_title_history=False, use_xuid_cache=False, user_profile=None):
+
+    if not client:
+        print(f"* Fetching details for Xbox user '{gamertag}'...\n")
+
+    session = None
+
+    if not client:
+        print_step("Authenticating with Xbox...")
+        try:
+            session = SignedSession()
+            auth_mgr = AuthenticationManager(session, MS_APP_CLIENT_ID, MS_APP_CLIENT_SECRET, "")
+            await authenticate_and_refresh_tokens(auth_mgr)
+
+            xbl_client = XboxLiveClient(auth_mgr)
+        except Exception as e:
+            print(f"\n* Error: {e}")
+            if session:
+                await session.aclose()
+            sys.exit(1)
+        print_ok()
+    else:
+        xbl_client = client
+
+    if not user_profile:
+        print_step("Fetching profile info...")
+        try:
+            user_profile = await xbox_resolve_profile(xbl_client, gamertag, use_cache=use_xuid_cache)
+            if not user_profile:
+                print(f"\n* Error: Cannot get profile for user {gamertag}")
+                if session:
+                    await session.aclose()
+                sys.exit(1)
+        except Exception as e:
+            print(f"\n* Error: {e}")
+            if session:
+                await session.aclose()
+            sys.exit(1)
+        print_ok()
 
-            # Try to get the session from the XboxLiveClient
-            http_session = None
-            if hasattr(xbl_client, 'session'):
-                http_session = getattr(xbl_client, 'session')
-            elif hasattr(xbl_client, '_session'):
-                http_session = getattr(xbl_client, '_session')
-            elif hasattr(xbl_client, '_auth_mgr'):
-                auth_mgr = getattr(xbl_client, '_auth_mgr')
-                if hasattr(auth_mgr, 'session'):
-                    http_session = getattr(auth_mgr, 'session')
+    xuid = user_profile["xuid"]
+    settings = user_profile["settings"]
+    location = settings.get("location", "")
+    bio = settings.get("bio", "")
+    realname = settings.get("realname", "")
+    gamerscore = settings.get("gamerscore", "0")
+    tier = settings.get("tier", "")
+    debug_print(f"Profile fetched: XUID={xuid}, Gamerscore={gamerscore}, Tier={tier}")
 
-            if http_session:
-                response = await http_session.get(url, headers=headers)
-                response.raise_for_status()
-                friends_data = response.json()
+    # Everything below only needs the XUID, so run it concurrently and print the steps in order
+    semaphore = asyncio.Semaphore(max(1, XBOX_API_MAX_CONCURRENCY))
+    presence_task = asyncio.ensure_future(run_with_semaphore(semaphore, xbox_get_presence(xbl_client, xuid)))
+    friends_task = asyncio.ensure_future(run_with_semaphore(semaphore, xbox_get_friends(xbl_client, xuid)))
+    history_task = None
+    achievements_task = None
+    # Fetch history if we need to show recent games OR recent achievements (since we use games to look up achievements)
+    if show_recent_games or show_recent_achievements:
+        history_task = asyncio.ensure_future(run_with_semaphore(semaphore, xbox_get_title_history(xbl_client, xuid, max(20, games_count))))
+    if show_recent_achievements:
+        achievements_task = asyncio.ensure_future(run_with_semaphore(semaphore, xbox_get_recent_achievements(xbl_client, xuid)))
+    info_tasks = [t for t in (presence_task, friends_task, history_task, achievements_task) if t]
 
-                if 'people' in friends_data:
-                    friends_list_raw = friends_data['people']
-                    friends_list = [f for f in friends_list_raw if str(f.get('xuid', '')) != str(xuid)]
-                    friends_count = len(friends_list)
-                    debug_print(f"Friends fetched via direct API: {friends_count}")
-            else:
-                debug_print("Could not find HTTP session for direct API call")
-                # Last fallback - get count from summary
-                friends_summary = await xbl_client.people.get_friends_summary_by_xuid(str(xuid))
-                if hasattr(friends_summary, 'target_following_count'):
-                    friends_count = friends_summary.target_following_count
-                    debug_print(f"Friends count from summary: {friends_count}")
+    print_step("Fetching presence info...")
+    try:
+        presence = await presence_task
+        presence_info = xbox_process_presence(presence, False)
+        status, title_name, game_name, platform, lastonline_ts = presence_info
+    except Exception as e:
+        print(f"\n* Error: Cannot get presence for user {gamertag}: {e}")
+        await cancel_tasks(info_tasks)
+        if session:
+            await session.aclose()
+        sys.exit(1)
+    print_ok()
 
-        except Exception as e2:
-            debug_print(f"Direct API and summary fallbacks failed: {e2}")
-            print(f"Warning: Could not fetch friends: {e2}")
+    # Fetch title history timestamp as fallback for "appear offline" users
+    lastonline_source_history = False
+    title_history_ts, title_history_game = 0, ""
+    if status.lower() == "offline" or fetch_title_history:
+        print_step("Checking title history...")
+        title_history_ts, title_history_game = await xbox_get_latest_title_played_ts(xbl_client, xuid)
+        if status.lower() == "offline":
+            lastonline_ts, lastonline_source_history = xbox_get_best_lastonline_ts(lastonline_ts, title_history_ts)
+        print_ok()
+
+    # Friends
+    friends_count = 0
+    friends_list = []
+    print_step("Fetching friends info...")
+    try:
+        friends_count, friends_list = await friends_task
+    except Exception as e:
+        print(f"Warning: Could not fetch friends: {e}")
 
     if friends_list:
         debug_print(f"Friends list ({len(friends_list)}):")
@@ -1198,18 +2824,10 @@ async def get_user_info(gamertag, client=None, show_friends=False, show_recent_a
     # Title History (Recent Games)
     recent_games = []
 
-    # Fetch history if we need to show recent games OR recent achievements (since we use games to look up achievements)
-    if show_recent_games or show_recent_achievements:
+    if history_task:
         print_step("Fetching game history...")
         try:
-            # Requesting details including ServiceConfigId (needed for stats) and Image
-            history_response = await xbl_client.titlehub.get_title_history(
-                xuid,
-                fields=[TitleFields.ACHIEVEMENT, TitleFields.SERVICE_CONFIG_ID, TitleFields.IMAGE],
-                max_items=max(20, games_count)
-            )
-            if history_response.titles:
-                recent_games = history_response.titles[:]
+            recent_games = await history_task
         except Exception as e:
             print(f"Warning: Could not fetch game history: {e}")
 
@@ -1227,17 +2845,19 @@ async def get_user_info(gamertag, client=None, show_friends=False, show_recent_a
 
         print_ok()
 
+    # Playtime stats for the recent games table, fetched up front instead of one by one while printing
+    playtimes = {}
+    if show_recent_games and recent_games:
+        print_step("Fetching playtime stats...")
+        playtimes = await xbox_get_playtimes(xbl_client, xuid, recent_games[:games_count], semaphore)
+        print_ok()
+
     # Recent Achievements
     recent_achievements = []
-    if show_recent_achievements:
+    if achievements_task:
         print_step("Fetching achievements...")
         try:
-            ach_response = await xbl_client.achievements.get_achievements_xboxone_recent_progress_and_info(xuid)
-            if hasattr(ach_response, 'achievements'):
-                recent_achievements = getattr(ach_response, 'achievements')
-            # Sometimes it might return a list directly (rare but possible in some lib versions)
-            elif isinstance(ach_response, list):
-                recent_achievements = ach_response
+            recent_achievements = await achievements_task
         except Exception as e:
             print(f"Warning: Could not fetch achievements: {e}")
 
@@ -1363,27 +2983,13 @@ async def get_user_info(gamertag, client=None, show_friends=False, show_recent_a
             t_last = convert_iso_str_to_datetime(title.title_history.last_time_played) if title.title_history else None
             t_last_str = get_date_from_ts(t_last) if t_last else "n/a"
 
-            # Fetch stats (Playtime)
+            # Stats (Playtime)
             t_playtime = "0h 0m"
-            if title.service_config_id:
-                try:
-                    stats = await xbl_client.userstats.get_stats(xuid, title.service_config_id, cast(List[GeneralStatsField], [GeneralStatsField.MINUTES_PLAYED]))
-                    mins = 0
-
-                    stat_list_scid = getattr(stats, 'stat_list_scid', None)
-                    statlistscollection = getattr(stats, 'statlistscollection', None)
-
-                    if stat_list_scid:
-                        mins = next((s.value for s in stat_list_scid[0].stats if s.name == "MinutesPlayed"), 0)
-                    elif statlistscollection:
-                        mins = next((s.value for s in statlistscollection[0].stats if s.name == "MinutesPlayed"), 0)
-
-                    if mins:
-                        hours = int(mins) // 60
-                        mins_rem = int(mins) % 60
-                        t_playtime = f"{hours}h {mins_rem}m"
-                except Exception:
-                    pass
+            mins = playtimes.get(title.title_id, 0)
+            if mins:
+                hours = mins // 60
+                mins_rem = mins % 60
+                t_playtime = f"{hours}h {mins_rem}m"
 
             name_fmt = _shorten_middle(t_name, w_title)
 
@@ -1399,35 +3005,7 @@ async def get_user_info(gamertag, client=None, show_friends=False, show_recent_a
         print("\nRecent Achievements:\n")
         debug_print("Method 2 (Deep Scan) - Checking recent games for achievements...")
 
-        all_recent_achievements = []
-
-        # Process top recent games to get achievements
-        for title_prog in recent_games:
-            # print(f"DEBUG: Checking {title_prog.name}")
-            try:
-                game_achievements = await xbl_client.achievements.get_achievements_xboxone_gameprogress(xuid, title_prog.title_id)
-                debug_print(f"Fetching detailed achievements for '{title_prog.name}'...")
-
-                ach_list = []
-                if isinstance(game_achievements, list):
-                    ach_list = game_achievements
-                elif hasattr(game_achievements, 'achievements'):
-                    ach_list = game_achievements.achievements
-
-                unlocked_achs = [a for a in ach_list if a.progress_state == "Achieved"]
-                if unlocked_achs:
-                    debug_print(f"  > Found {len(unlocked_achs)} unlocked achievements")
-                # print(f"DEBUG: Unlocked {len(unlocked_achs)}")
-
-                for ach in unlocked_achs:
-                    # Store as tuple (achievement, title_name) since we cannot modify the model
-                    all_recent_achievements.append((ach, title_prog.name))
-
-            except Exception as e:
-                pass
-
-        # Sort ALL collected achievements by time_unlocked (descending)
-        all_recent_achievements.sort(key=lambda x: x[0].progression.time_unlocked, reverse=True)
+        latest_achievements = await xbox_get_latest_achievements(xbl_client, xuid, recent_games, achievements_count, semaphore)
 
         # Determine column widths for achievements
         term_width = 100
@@ -1452,7 +3030,7 @@ async def get_user_info(gamertag, client=None, show_friends=False, show_recent_a
         print(hdr)
         print(sep)
 
-        for ach, title_name in all_recent_achievements[:achievements_count]:
+        for ach, title_name in latest_achievements:
             t_unlock = convert_iso_str_to_datetime(ach.progression.time_unlocked)
             t_unlock_str = get_date_from_ts(t_unlock) if t_unlock else "n/a"
 
@@ -1466,6 +3044,13 @@ async def get_user_info(gamertag, client=None, show_friends=False, show_recent_a
     if session and not client:
         await session.aclose()
 
+    return {
+        "xuid": int(xuid),
+        "settings": settings,
+        "presence": presence_info,
+        "title_history": (title_history_ts, title_history_game),
+    }
+
 
 def find_config_file(cli_path=None):
     """
@@ -1504,14 +3089,262 @@ def resolve_executable(path):
     raise FileNotFoundError(f"Could not find executable '{path}'")
 
 
+# Events returned by XboxUserState.apply(): user's status change, game change and game started while appearing
+# offline (detected via title history); ts is the time of the change and since_ts the time of the previous one
+StatusChangeEvent = namedtuple("StatusChangeEvent", ["ts", "status_old", "status", "since_ts", "platform", "game_name", "online_start_ts", "short_offline_ts", "games_number", "game_total_ts"])
+GameChangeEvent = namedtuple("GameChangeEvent", ["ts", "game_name_old", "game_name", "since_ts", "platform"])
+TitleHistoryActivityEvent = namedtuple("TitleHistoryActivityEvent", ["ts", "title_history_ts", "game_name"])
+
+
+# Monitoring state of a single Xbox user, updated by apply() with every presence poll; it does no I/O, the emitted
+# events are reported by xbox_monitor_user()
+# OFFLINE_INTERRUPT rule: if the user gets online again within offline_interrupt seconds, the online session start
+# and its game statistics are restored (short offline interruption)
+class XboxUserState:
+    __slots__ = ("status", "status_ts", "online_start_ts", "online_start_ts_old", "game_name", "game_ts", "games_number", "game_total_ts", "game_total_after_offline_counted", "title_history_ts", "title_history_game", "fingerprint", "offline_interrupt", "polls_processed", "polls_skipped")
+
+    def __init__(self, presence_record, status_ts, offline_interrupt, online_start_ts=0, game_ts=0, title_history_ts=0, title_history_game=""):
+        self.status = presence_record.status
+        self.status_ts = status_ts
+        self.online_start_ts = online_start_ts
+        self.online_start_ts_old = online_start_ts
+        self.game_name = presence_record.game_name
+        self.game_ts = game_ts
+        self.games_number = 1 if self.status != "offline" and self.game_name else 0
+        self.game_total_ts = 0
+        self.game_total_after_offline_counted = False
+        self.title_history_ts = max(title_history_ts, 0)
+        self.title_history_game = title_history_game if title_history_ts > 0 else ""
+        self.offline_interrupt = offline_interrupt
+        self.fingerprint = (presence_record, title_history_ts)
+        self.polls_processed = 0
+        self.polls_skipped = 0
+
+    # Applies presence (PresenceRecord) and title history polled at now, returns the list of emitted events
+    # or None if presence and title history are the same as in the previous poll (nothing can change then)
+    def apply(self, presence_record, now, title_history_ts=0, title_history_game=""):
+        fingerprint = (presence_record, title_history_ts)
+        if fingerprint == self.fingerprint:
+            self.polls_skipped += 1
+            return None
+        self.fingerprint = fingerprint
+        self.polls_processed += 1
+
+        status = presence_record.status
+        game_name = presence_record.game_name
+        platform = presence_record.platform
+        now = int(now)
+        events = []
+
+        if status != self.status:
+            status_old = self.status
+            online_start_ts = 0
+            short_offline_ts = 0
+
+            # Got online
+            if status_old == "offline" and status and status != "offline":
+                self.game_total_after_offline_counted = False
+                if (now - self.status_ts) > self.offline_interrupt or not self.online_start_ts_old:
+                    self.online_start_ts = now
+                    self.game_total_ts = 0
+                    self.games_number = 0
+                else:
+                    self.online_start_ts = self.online_start_ts_old
+                    short_offline_ts = self.online_start_ts_old
+                online_start_ts = self.online_start_ts
+
+            # Got offline
+            if status_old and status_old != "offline" and status == "offline":
+                # Sync baseline with current title history to prevent false "appear offline" detection
+                if title_history_ts > 0:
+                    self.title_history_ts = title_history_ts
+                    self.title_history_game = title_history_game
+                if self.games_number > 0 and self.game_name and not game_name:
+                    self.game_total_ts += now - self.game_ts
+                    self.game_total_after_offline_counted = True
+                online_start_ts = self.online_start_ts
+                self.online_start_ts_old = self.online_start_ts
+                self.online_start_ts = 0
+
+            events.append(StatusChangeEvent(now, status_old, status, self.status_ts, platform, game_name, online_start_ts, short_offline_ts, self.games_number, self.game_total_ts))
+            self.status = status
+            self.status_ts = now
+
+        if game_name != self.game_name:
+            game_name_old = self.game_name
+            if game_name_old and game_name:
+                self.game_total_ts += now - self.game_ts
+                self.games_number += 1
+            elif game_name:
+                self.games_number += 1
+            elif not self.game_total_after_offline_counted:
+                self.game_total_ts += now - self.game_ts
+
+            events.append(GameChangeEvent(now, game_name_old, game_name, self.game_ts, platform))
+            self.game_name = game_name
+            self.game_ts = now
+
+        # New game session started while the user appears offline
+        if status == "offline" and title_history_ts > 0 and self.title_history_ts > 0 and title_history_ts > self.title_history_ts:
+            events.append(TitleHistoryActivityEvent(now, title_history_ts, title_history_game))
+            self.title_history_ts = title_history_ts
+            self.title_history_game = title_history_game
+
+        return events
+
+    # Returns poll counters in human readable format; eg. 120 processed, 3480 skipped (unchanged presence)
+    def get_poll_stats_str(self):
+        return f"{self.polls_processed} processed, {self.polls_skipped} skipped (unchanged presence)"
+
+
+# Reports user's status change (StatusChangeEvent): saves the last status file, prints it and sends email notification
+def xbox_report_status_change(xbox_gamertag, event, xbox_last_status_file):
+    status_old = event.status_old
+    status = event.status
+    status_ts = event.ts
+    status_ts_old = event.since_ts
+
+    platform_str = ""
+    if event.platform:
+        platform_str = f" ({event.platform})"
+
+    last_status_to_save = []
+    last_status_to_save.append(status_ts)
+    last_status_to_save.append(status)
+    try:
+        with open(xbox_last_status_file, 'w', encoding="utf-8") as f:
+            json.dump(last_status_to_save, f, indent=2)
+    except Exception as e:
+        print(f"* Cannot save last status to '{xbox_last_status_file}' file: {e}")
+
+    print(f"Xbox user {xbox_gamertag} changed status from {status_old} to {status}{platform_str}")
+    status_range = get_range_of_dates_from_tss(int(status_ts_old), int(status_ts), short=True, always_show_year=True)
+    print(f"User was {status_old} for {calculate_timespan(int(status_ts), int(status_ts_old))} ({status_range})")
+
+    m_subject_was_since = f", was {status_old}: {status_range}"
+    m_subject_after = calculate_timespan(int(status_ts), int(status_ts_old), show_seconds=False)
+    m_body_was_since = f" ({status_range})"
+
+    m_body_short_offline_msg = ""
+    act_inact_flag = False
+
+    # Player got online
+    if status_old == "offline" and status and status != "offline":
+        print(f"*** User got ACTIVE ! (was offline since {get_date_from_ts(status_ts_old)})")
+        if poll_scheduler:
+            poll_scheduler.record_online(xbox_gamertag, now_local())
+        if event.short_offline_ts:
+            short_offline_msg = f"Short offline interruption ({display_time(status_ts - status_ts_old)}), online start timestamp set back to {get_short_date_from_ts(event.short_offline_ts)}"
+            m_body_short_offline_msg = f"\n\n{short_offline_msg}"
+            print(short_offline_msg)
+        act_inact_flag = True
+
+    m_body_played_games = ""
+
+    # Player got offline
+    if status_old and status_old != "offline" and status == "offline":
+        status_online_start_ts = event.online_start_ts
+        if status_online_start_ts > 0:
+            m_subject_after = calculate_timespan(int(status_ts), int(status_online_start_ts), show_seconds=False)
+            online_range = get_range_of_dates_from_tss(int(status_online_start_ts), int(status_ts), short=True, always_show_year=True)
+            online_since_msg = f"(after {calculate_timespan(int(status_ts), int(status_online_start_ts), show_seconds=False)}: {online_range})"
+            m_subject_was_since = f", was available: {online_range}"
+            m_body_was_since = f" ({status_range})\n\nUser was available for {calculate_timespan(int(status_ts), int(status_online_start_ts), show_seconds=False)} ({online_range})"
+        else:
+            online_since_msg = ""
+        if event.games_number > 0:
+            m_body_played_games = f"\n\nUser played {event.games_number} games for total time of {display_time(event.game_total_ts)}"
+            print(f"User played {event.games_number} games for total time of {display_time(event.game_total_ts)}")
+        print(f"*** User got OFFLINE ! {online_since_msg}")
+        act_inact_flag = True
+
+    m_body_user_in_game = ""
+    if status != "offline" and event.game_name:
+        print(f"User is currently in-game: {event.game_name}{platform_str}")
+        m_body_user_in_game = f"\n\nUser is currently in-game: {event.game_name}{platform_str}"
+
+    m_body = f"Xbox user {xbox_gamertag} changed status from {status_old} to {status}{platform_str}\n\nUser was {status_old} for {calculate_timespan(int(status_ts), int(status_ts_old))}{m_body_was_since}{m_body_short_offline_msg}{m_body_user_in_game}{m_body_played_games}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
+    if event.platform:
+        platform_str = f"{event.platform}, "
+    m_subject = f"Xbox user {xbox_gamertag} is now {status} ({platform_str}after {m_subject_after}{m_subject_was_since})"
+    if STATUS_NOTIFICATION or (ACTIVE_INACTIVE_NOTIFICATION and act_inact_flag):
+        print(f"Sending email notification to {RECEIVER_EMAIL}")
+        notify_email(m_subject, m_body, "", SMTP_SSL)
+
+    print_cur_ts("Timestamp:\t\t\t")
+
+
+# Reports user's game change (GameChangeEvent): prints it and sends email notification
+def xbox_report_game_change(xbox_gamertag, event):
+    game_name_old = event.game_name_old
+    game_name = event.game_name
+    game_ts = event.ts
+    game_ts_old = event.since_ts
+
+    m_subject = m_body = ""
+
+    platform_str = ""
+    if event.platform:
+        platform_str = f" ({event.platform})"
+
+    # User changed the game
+    if game_name_old and game_name:
+        print(f"Xbox user {xbox_gamertag} changed game from '{game_name_old}' to '{game_name}'{platform_str} after {calculate_timespan(int(game_ts), int(game_ts_old))}")
+        game_range = get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True, between_sep=' to ')
+        print(f"User played game from {game_range}")
+        m_body = f"Xbox user {xbox_gamertag} changed game from '{game_name_old}' to '{game_name}'{platform_str} after {calculate_timespan(int(game_ts), int(game_ts_old))}\n\nUser played game from {game_range}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
+        if event.platform:
+            platform_str = f"{event.platform}, "
+        m_subject = f"Xbox user {xbox_gamertag} changed game to '{game_name}' ({platform_str}after {calculate_timespan(int(game_ts), int(game_ts_old), show_seconds=False)}: {get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True)})"
+
+    # User started playing new game
+    elif game_name:
+        print(f"Xbox user {xbox_gamertag} started playing '{game_name}'{platform_str}")
+        m_subject = f"Xbox user {xbox_gamertag} now plays '{game_name}'{platform_str}"
+        m_body = f"Xbox user {xbox_gamertag} now plays '{game_name}'{platform_str}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
+
+    # User stopped playing the game
+    else:
+        print(f"Xbox user {xbox_gamertag} stopped playing '{game_name_old}' after {calculate_timespan(int(game_ts), int(game_ts_old))}")
+        game_range = get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True, between_sep=' to ')
+        print(f"User played game from {game_range}")
+        m_subject = f"Xbox user {xbox_gamertag} stopped playing '{game_name_old}' (after {calculate_timespan(int(game_ts), int(game_ts_old), show_seconds=False)}: {get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True)})"
+        m_body = f"Xbox user {xbox_gamertag} stopped playing '{game_name_old}' after {calculate_timespan(int(game_ts), int(game_ts_old))}\n\nUser played game from {game_range}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
+
+    if GAME_CHANGE_NOTIFICATION and m_subject and m_body:
+        print(f"Sending email notification to {RECEIVER_EMAIL}")
+        notify_email(m_subject, m_body, "", SMTP_SSL)
+
+    print_cur_ts("Timestamp:\t\t\t")
+
+
+# Reports game session started while the user appears offline (TitleHistoryActivityEvent)
+def xbox_report_title_history_activity(xbox_gamertag, event):
+    activity_detected_ts = get_date_from_ts(event.title_history_ts)
+    game_info = f" '{event.game_name}'" if event.game_name else ""
+    print(f"User detected playing a game{game_info} (via title history)! Started: {activity_detected_ts}")
+
+    m_subject = f"Xbox user {xbox_gamertag} detected playing{game_info} (via title history)"
+    m_body = f"Xbox user {xbox_gamertag} appears offline but was detected starting a game{game_info}.\n\nGame session started: {activity_detected_ts}\n\nNote: This was detected via title history. We cannot detect when the user stops playing via this method.{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
+
+    if ACTIVE_INACTIVE_NOTIFICATION or STATUS_NOTIFICATION:
+        print(f"Sending email notification to {RECEIVER_EMAIL}")
+        notify_email(m_subject, m_body, "", SMTP_SSL)
+
+    print_cur_ts("Timestamp:\t\t\t")
+
+
 # Main function that monitors activity of the specified Xbox user
-async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5, games_count=10):
+# If xbl_client is passed (multi-user mode), the shared Xbox Live client is used instead of creating a new session
+# ready_event (if passed) is set once the startup phase is finished and the monitoring loop begins
+# presence_batcher (if passed) is used to fetch presence in batches together with other monitored users
+# user_profile (if passed) is the profile already resolved in bulk (see xbox_resolve_profiles())
+# global_stats controls whether process-wide stats are printed at liveness checks (multi-user mode prints them once)
+async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5, games_count=10, xbl_client=None, ready_event=None, presence_batcher=None, user_profile=None, global_stats=True):
 
     alive_counter = 0
-    status_ts = 0
     status_ts_old = 0
     status_online_start_ts = 0
-    status_online_start_ts_old = 0
     lastonline_ts = 0
     status = ""
     xuid = 0
@@ -1521,13 +3354,7 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
     title_name = ""
     game_name = ""
     platform = ""
-    game_ts = 0
     game_ts_old = 0
-    game_total_ts = 0
-    games_number = 0
-    game_total_after_offline_counted = False
-    title_history_ts_old = 0  # Track previous title history timestamp for "appear offline" activity detection
-    title_history_game_old = ""  # Track game name for "appear offline" activity detection
     presence_lastonline_cache_ts = 0  # Last known valid presence.last_seen timestamp
     offline_grace_attempts = 3
     offline_grace_delay_seconds = 2
@@ -1538,87 +3365,50 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
     except Exception as e:
         print(f"* Error: {e}")
 
-    # Create a XBOX HTTP client session
-    async with SignedSession() as session:
+    if poll_scheduler:
+        poll_scheduler.register(xbox_gamertag, csv_file_name)
 
-        # Initialize with global OAUTH config options (MS_APP_CLIENT_ID & MS_APP_CLIENT_SECRET)
-        auth_mgr = AuthenticationManager(session, MS_APP_CLIENT_ID, MS_APP_CLIENT_SECRET, "")
+    async with AsyncExitStack() as stack:
 
         # Print detailed user info on startup
         print("* Fetching details for Xbox user '{}'...\n".format(xbox_gamertag))
 
-        # Helper to print step message
-        def _print_step(msg):
-            global STDOUT_AT_START_OF_LINE
-            sys.stdout.write(f"- {msg}".ljust(32))
-            sys.stdout.flush()
-            STDOUT_AT_START_OF_LINE = False
-
-        # Helper to print OK
-        def _print_ok():
-            global STDOUT_AT_START_OF_LINE
-            print("OK")
-            STDOUT_AT_START_OF_LINE = True
-
-        _print_step("Authenticating with Xbox...")
-        await authenticate_and_refresh_tokens(auth_mgr)
-
-        _print_ok()
-
-        # Construct the Xbox API client from AuthenticationManager instance
-        xbl_client = XboxLiveClient(auth_mgr)
+        # Create a XBOX HTTP client session (unless the shared one was passed)
+        if xbl_client is None:
+            session = await stack.enter_async_context(SignedSession())
 
-        await get_user_info(xbox_gamertag, client=xbl_client, show_friends=False, show_recent_achievements=False, show_recent_games=False, achievements_count=achievements_count, games_count=games_count)
+            # Initialize with global OAUTH config options (MS_APP_CLIENT_ID & MS_APP_CLIENT_SECRET)
+            auth_mgr = AuthenticationManager(session, MS_APP_CLIENT_ID, MS_APP_CLIENT_SECRET, "")
 
-        # Get profile for user with specified gamer tag to grab some details like XUID
-        try:
-            profile = await xbl_client.profile.get_profile_by_gamertag(xbox_gamertag)
-        except Exception as e:
-            print(f"* Error: Cannot get profile for user {xbox_gamertag}{': ' + str(e) if e else ''}")
-            sys.exit(1)
+            print_step("Authenticating with Xbox...")
+            await authenticate_and_refresh_tokens(auth_mgr)
 
-        if 'profile_users' in dir(profile):
+            print_ok()
 
-            try:
-                xuid = int(profile.profile_users[0].id)
-            except IndexError:
-                print(f"* Error: Cannot get XUID for user {xbox_gamertag}")
-                sys.exit(1)
+            # Construct the Xbox API client from AuthenticationManager instance
+            xbl_client = XboxLiveClient(auth_mgr)
 
-            location_tmp = next((x for x in profile.profile_users[0].settings if x.id == "Location"), None)
-            if location_tmp:
-                if location_tmp.value:
-                    location = location_tmp.value
-            bio_tmp = next((x for x in profile.profile_users[0].settings if x.id == "Bio"), None)
-            if bio_tmp:
-                if bio_tmp.value:
-                    bio = bio_tmp.value
-            realname_tmp = next((x for x in profile.profile_users[0].settings if x.id == "RealNameOverride"), None)
-            if realname_tmp:
-                if realname_tmp.value:
-                    realname = realname_tmp.value
+        # Print detailed user info on startup and reuse its lookups (XUID, settings, presence & title history baseline)
+        user_info = await get_user_info(xbox_gamertag, client=xbl_client, show_friends=False, show_recent_achievements=False, show_recent_games=False, achievements_count=achievements_count, games_count=games_count, fetch_title_history=True, use_xuid_cache=True, user_profile=user_profile)
 
+        xuid = user_info["xuid"]
         if xuid == 0:
             print(f"* Error: Cannot get XUID for user {xbox_gamertag}")
             sys.exit(1)
 
-        # Get presence status (by XUID)
-        try:
-            presence = await xbl_client.presence.get_presence(str(xuid), PresenceLevel.ALL)
-        except Exception as e:
-            print(f"* Error: Cannot get presence for user {xbox_gamertag}{': ' + str(e) if e else ''}")
-            sys.exit(1)
+        location = user_info["settings"]["location"] or ""
+        bio = user_info["settings"]["bio"] or ""
+        realname = user_info["settings"]["realname"] or ""
 
-        status, title_name, game_name, platform, lastonline_ts = xbox_process_presence_class(presence, False)
+        status, title_name, game_name, platform, lastonline_ts = user_info["presence"]
         if lastonline_ts > 0:
             presence_lastonline_cache_ts = lastonline_ts
 
         # Establish title history baseline
-        title_history_ts, title_history_game = await xbox_get_latest_title_played_ts(xbl_client, xuid)
+        title_history_ts, title_history_game = user_info["title_history"]
 
-        if title_history_ts > 0:
-            title_history_ts_old = title_history_ts
-            title_history_game_old = title_history_game
+        title_history_poller = XboxTitleHistoryPoller(xbl_client, xuid, TITLE_HISTORY_CHECK_INTERVAL)
+        title_history_poller.seed(title_history_ts, title_history_game)
 
         # Only use this when user appears offline - otherwise presence data is accurate
         if status == "offline":
@@ -1635,7 +3425,6 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
 
         if status and status != "offline":
             status_online_start_ts = status_ts_old
-            status_online_start_ts_old = status_online_start_ts
 
         xbox_last_status_file = f"xbox_{xbox_gamertag}_last_status.json"
         last_status_read = []
@@ -1668,7 +3457,6 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
                         status_ts_old = last_status_ts
                     if status and status != "offline" and status == last_status:
                         status_online_start_ts = last_status_ts
-                        status_online_start_ts_old = status_online_start_ts
                         status_ts_old = last_status_ts
 
         if last_status_ts > 0 and status != last_status:
@@ -1684,7 +3472,6 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
         if status != "offline" and game_name:
             print(f"\nUser is currently in-game:\t{game_name}")
             game_ts_old = int(time.time())
-            games_number += 1
 
         try:
             if csv_file_name and (status != last_status):
@@ -1692,6 +3479,12 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
         except Exception as e:
             print(f"* Error: {e}")
 
+        try:
+            if event_store and (status != last_status):
+                event_store.add(time.time(), xuid, xbox_gamertag, platform, status, game_name)
+        except Exception as e:
+            print(f"* Error: Cannot store event in '{SQLITE_DB_FILE}': {e}")
+
         if last_status_ts == 0:
             if lastonline_ts and status == "offline":
                 status_ts_old = lastonline_ts
@@ -1710,39 +3503,38 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
                 print(f"\n* Last time user was available:\t{last_status_dt_str}")
             print(f"\n* User is {str(status).upper()} for:\t\t{calculate_timespan(now_local(), int(status_ts_old), show_seconds=False)}")
 
-        status_old = status
-        game_name_old = game_name
+        user_state = XboxUserState(user_info["presence"], status_ts_old, OFFLINE_INTERRUPT, online_start_ts=status_online_start_ts, game_ts=game_ts_old, title_history_ts=title_history_ts, title_history_game=title_history_game)
+        debug_print(f"User state size: {sys.getsizeof(user_state)} bytes")
 
         print_cur_ts("\nTimestamp:\t\t\t")
 
         alive_counter = 0
+        liveness_ts = time.monotonic()
         email_sent = False
 
-        m_subject = m_body = ""
+        sleep_interval = get_check_interval(xbox_gamertag, status)
 
-        if status and status != "offline":
-            sleep_interval = XBOX_ACTIVE_CHECK_INTERVAL
-        else:
-            sleep_interval = XBOX_CHECK_INTERVAL
+        if ready_event:
+            ready_event.set()
 
         await asyncio.sleep(sleep_interval)
 
         # Main loop
         while True:
             try:
-                presence = await xbl_client.presence.get_presence(str(xuid), PresenceLevel.ALL)
-                status, title_name, game_name, platform, lastonline_ts = xbox_process_presence_class(presence)
+                presence = await xbox_get_presence(xbl_client, xuid, presence_batcher)
+                status, title_name, game_name, platform, lastonline_ts = xbox_process_presence(presence)
                 if lastonline_ts > 0:
                     presence_lastonline_cache_ts = lastonline_ts
 
                 if status == "offline":
                     # Give presence a short grace window when transitioning to offline with missing last_seen
-                    if status_old != "offline" and lastonline_ts <= 0:
+                    if user_state.status != "offline" and lastonline_ts <= 0:
                         debug_print(f"Offline transition with missing presence timestamp, retrying presence up to {offline_grace_attempts}x every {offline_grace_delay_seconds}s...")
                         for retry_num in range(1, offline_grace_attempts + 1):
                             await asyncio.sleep(offline_grace_delay_seconds)
-                            retry_presence = await xbl_client.presence.get_presence(str(xuid), PresenceLevel.ALL)
-                            retry_status, retry_title_name, retry_game_name, retry_platform, retry_lastonline_ts = xbox_process_presence_class(retry_presence)
+                            retry_presence = await xbox_get_presence(xbl_client, xuid, presence_batcher)
+                            retry_status, retry_title_name, retry_game_name, retry_platform, retry_lastonline_ts = xbox_process_presence(retry_presence)
                             debug_print(f"Grace retry {retry_num}/{offline_grace_attempts}: state={retry_status}, lastonline={get_debug_date_from_ts(retry_lastonline_ts)}")
 
                             # Use refreshed offline payload if it now includes last_seen
@@ -1770,7 +3562,8 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
 
                 if status == "offline":
                     debug_print("User is offline, checking title history fallback...")
-                    title_history_ts, title_history_game = await xbox_get_latest_title_played_ts(xbl_client, xuid)
+                    # Always fetch it right away when the user has just got offline, otherwise at its own cadence
+                    title_history_ts, title_history_game = await title_history_poller.get(force=(user_state.status != "offline"))
                     presence_ts_for_decision = lastonline_ts
                     lastactive_source = "presence_last_seen_live"
                     lastactive_confidence = "high"
@@ -1791,211 +3584,155 @@ async def xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=5,
 
                     debug_print(f"Current status: {status}")
                     debug_print(f"Title history: {title_history_ts} ('{title_history_game}')")
-                    debug_print(f"Baseline:      {title_history_ts_old} ('{title_history_game_old}')")
+                    debug_print(f"Baseline:      {user_state.title_history_ts} ('{user_state.title_history_game}')")
                     debug_print(f"Last active chosen: source={lastactive_source}, confidence={lastactive_confidence}, ts={get_debug_date_from_ts(effective_lastactive_ts)}")
 
                 if not status:
                     raise ValueError('Xbox user status is empty')
                 email_sent = False
             except Exception as e:
-                if status and status != "offline":
-                    sleep_interval = XBOX_ACTIVE_CHECK_INTERVAL
-                else:
-                    sleep_interval = XBOX_CHECK_INTERVAL
-                print(f"* Error getting presence, retrying in {display_time(sleep_interval)}{': ' + str(e) if e else ''}")
+                sleep_interval = get_check_interval(xbox_gamertag, status)
+                print(f"* Error getting presence for user {xbox_gamertag}, retrying in {display_time(sleep_interval)}{': ' + str(e) if e else ''}")
                 if 'validation' in str(e) or 'auth' in str(e) or 'token' in str(e):
                     print("* Xbox auth key might not be valid anymore!")
                     if ERROR_NOTIFICATION and not email_sent:
                         m_subject = f"xbox_monitor: Xbox auth key error! (user: {xbox_gamertag})"
                         m_body = f"Xbox auth key might not be valid anymore: {e}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
                         print(f"Sending email notification to {RECEIVER_EMAIL}")
-                        send_email(m_subject, m_body, "", SMTP_SSL)
+                        notify_email(m_subject, m_body, "", SMTP_SSL, urgent=True)
                         email_sent = True
                 print_cur_ts("Timestamp:\t\t\t")
                 await asyncio.sleep(sleep_interval)
                 continue
 
-            change = False
-            act_inact_flag = False
+            events = user_state.apply(PresenceRecord(status, title_name, game_name, platform, lastonline_ts), time.time(), title_history_ts, title_history_game)
+            if events:
+                for event in events:
+                    if isinstance(event, StatusChangeEvent):
+                        xbox_report_status_change(xbox_gamertag, event, xbox_last_status_file)
+                    elif isinstance(event, GameChangeEvent):
+                        xbox_report_game_change(xbox_gamertag, event)
+                    else:
+                        xbox_report_title_history_activity(xbox_gamertag, event)
+
+                alive_counter = 0
+                liveness_ts = time.monotonic()
 
-            status_ts = int(time.time())
-            game_ts = int(time.time())
+                try:
+                    if csv_file_name:
+                        write_csv_entry(csv_file_name, now_local_naive(), status, game_name)
+                except Exception as e:
+                    print(f"* Error: {e}")
 
-            # Player status changed
-            if status != status_old:
+                try:
+                    if event_store:
+                        event_store.add(time.time(), xuid, xbox_gamertag, platform, status, game_name)
+                except Exception as e:
+                    print(f"* Error: Cannot store event in '{SQLITE_DB_FILE}': {e}")
 
-                platform_str = ""
-                if platform:
-                    platform_str = f" ({platform})"
+            alive_counter += 1
 
-                last_status_to_save = []
-                last_status_to_save.append(status_ts)
-                last_status_to_save.append(status)
+            if event_store:
                 try:
-                    with open(xbox_last_status_file, 'w', encoding="utf-8") as f:
-                        json.dump(last_status_to_save, f, indent=2)
+                    event_store.commit_if_due()
                 except Exception as e:
-                    print(f"* Cannot save last status to '{xbox_last_status_file}' file: {e}")
-
-                print(f"Xbox user {xbox_gamertag} changed status from {status_old} to {status}{platform_str}")
-                status_range = get_range_of_dates_from_tss(int(status_ts_old), int(status_ts), short=True, always_show_year=True)
-                print(f"User was {status_old} for {calculate_timespan(int(status_ts), int(status_ts_old))} ({status_range})")
-
-                m_subject_was_since = f", was {status_old}: {status_range}"
-                m_subject_after = calculate_timespan(int(status_ts), int(status_ts_old), show_seconds=False)
-                m_body_was_since = f" ({status_range})"
-
-                m_body_short_offline_msg = ""
-
-                # Player got online
-                if status_old == "offline" and status and status != "offline":
-                    print(f"*** User got ACTIVE ! (was offline since {get_date_from_ts(status_ts_old)})")
-                    game_total_after_offline_counted = False
-                    if (status_ts - status_ts_old) > OFFLINE_INTERRUPT or not status_online_start_ts_old:
-                        status_online_start_ts = status_ts
-                        game_total_ts = 0
-                        games_number = 0
-                    elif (status_ts - status_ts_old) <= OFFLINE_INTERRUPT and status_online_start_ts_old > 0:
-                        status_online_start_ts = status_online_start_ts_old
-                        short_offline_msg = f"Short offline interruption ({display_time(status_ts - status_ts_old)}), online start timestamp set back to {get_short_date_from_ts(status_online_start_ts_old)}"
-                        m_body_short_offline_msg = f"\n\n{short_offline_msg}"
-                        print(short_offline_msg)
-                    act_inact_flag = True
-
-                m_body_played_games = ""
-
-                # Player got offline
-                if status_old and status_old != "offline" and status == "offline":
-                    # Sync baseline with current title history to prevent false "appear offline" detection
-                    if title_history_ts > 0:
-                        title_history_ts_old = title_history_ts
-                        title_history_game_old = title_history_game
-                    if status_online_start_ts > 0:
-                        m_subject_after = calculate_timespan(int(status_ts), int(status_online_start_ts), show_seconds=False)
-                        online_range = get_range_of_dates_from_tss(int(status_online_start_ts), int(status_ts), short=True, always_show_year=True)
-                        online_since_msg = f"(after {calculate_timespan(int(status_ts), int(status_online_start_ts), show_seconds=False)}: {online_range})"
-                        m_subject_was_since = f", was available: {online_range}"
-                        m_body_was_since = f" ({status_range})\n\nUser was available for {calculate_timespan(int(status_ts), int(status_online_start_ts), show_seconds=False)} ({online_range})"
-                    else:
-                        online_since_msg = ""
-                    if games_number > 0:
-                        if game_name_old and not game_name:
-                            game_total_ts += (int(game_ts) - int(game_ts_old))
-                            game_total_after_offline_counted = True
-                        m_body_played_games = f"\n\nUser played {games_number} games for total time of {display_time(game_total_ts)}"
-                        print(f"User played {games_number} games for total time of {display_time(game_total_ts)}")
-                    print(f"*** User got OFFLINE ! {online_since_msg}")
-                    status_online_start_ts_old = status_online_start_ts
-                    status_online_start_ts = 0
-                    act_inact_flag = True
-
-                m_body_user_in_game = ""
-                if status != "offline" and game_name:
-                    print(f"User is currently in-game: {game_name}{platform_str}")
-                    m_body_user_in_game = f"\n\nUser is currently in-game: {game_name}{platform_str}"
-
-                change = True
-
-                m_body = f"Xbox user {xbox_gamertag} changed status from {status_old} to {status}{platform_str}\n\nUser was {status_old} for {calculate_timespan(int(status_ts), int(status_ts_old))}{m_body_was_since}{m_body_short_offline_msg}{m_body_user_in_game}{m_body_played_games}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
-                if platform:
-                    platform_str = f"{platform}, "
-                m_subject = f"Xbox user {xbox_gamertag} is now {status} ({platform_str}after {m_subject_after}{m_subject_was_since})"
-                if STATUS_NOTIFICATION or (ACTIVE_INACTIVE_NOTIFICATION and act_inact_flag):
-                    print(f"Sending email notification to {RECEIVER_EMAIL}")
-                    send_email(m_subject, m_body, "", SMTP_SSL)
-
-                status_ts_old = status_ts
-                print_cur_ts("Timestamp:\t\t\t")
+                    print(f"* Error: Cannot store events in '{SQLITE_DB_FILE}': {e}")
 
-            # Player started/stopped/changed the game
-            if game_name != game_name_old:
-
-                platform_str = ""
-                if platform:
-                    platform_str = f" ({platform})"
-
-                # User changed the game
-                if game_name_old and game_name:
-                    print(f"Xbox user {xbox_gamertag} changed game from '{game_name_old}' to '{game_name}'{platform_str} after {calculate_timespan(int(game_ts), int(game_ts_old))}")
-                    game_range = get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True, between_sep=' to ')
-                    print(f"User played game from {game_range}")
-                    game_total_ts += (int(game_ts) - int(game_ts_old))
-                    games_number += 1
-                    m_body = f"Xbox user {xbox_gamertag} changed game from '{game_name_old}' to '{game_name}'{platform_str} after {calculate_timespan(int(game_ts), int(game_ts_old))}\n\nUser played game from {game_range}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
-                    if platform:
-                        platform_str = f"{platform}, "
-                    m_subject = f"Xbox user {xbox_gamertag} changed game to '{game_name}' ({platform_str}after {calculate_timespan(int(game_ts), int(game_ts_old), show_seconds=False)}: {get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True)})"
-
-                # User started playing new game
-                elif not game_name_old and game_name:
-                    print(f"Xbox user {xbox_gamertag} started playing '{game_name}'{platform_str}")
-                    games_number += 1
-                    m_subject = f"Xbox user {xbox_gamertag} now plays '{game_name}'{platform_str}"
-                    m_body = f"Xbox user {xbox_gamertag} now plays '{game_name}'{platform_str}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
-
-                # User stopped playing the game
-                elif game_name_old and not game_name:
-                    print(f"Xbox user {xbox_gamertag} stopped playing '{game_name_old}' after {calculate_timespan(int(game_ts), int(game_ts_old))}")
-                    game_range = get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True, between_sep=' to ')
-                    print(f"User played game from {game_range}")
-                    if not game_total_after_offline_counted:
-                        game_total_ts += (int(game_ts) - int(game_ts_old))
-                    m_subject = f"Xbox user {xbox_gamertag} stopped playing '{game_name_old}' (after {calculate_timespan(int(game_ts), int(game_ts_old), show_seconds=False)}: {get_range_of_dates_from_tss(int(game_ts_old), int(game_ts), short=True, always_show_year=True)})"
-                    m_body = f"Xbox user {xbox_gamertag} stopped playing '{game_name_old}' after {calculate_timespan(int(game_ts), int(game_ts_old))}\n\nUser played game from {game_range}{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
-
-                change = True
-
-                if GAME_CHANGE_NOTIFICATION and m_subject and m_body:
-                    print(f"Sending email notification to {RECEIVER_EMAIL}")
-                    send_email(m_subject, m_body, "", SMTP_SSL)
-
-                game_ts_old = game_ts
-                print_cur_ts("Timestamp:\t\t\t")
+            # With adaptive polling the offline check interval varies, so the liveness check is based on elapsed time
+            if poll_scheduler:
+                liveness_due = LIVENESS_CHECK_INTERVAL > 0 and time.monotonic() - liveness_ts >= LIVENESS_CHECK_INTERVAL
+            else:
+                liveness_due = LIVENESS_CHECK_COUNTER and alive_counter >= LIVENESS_CHECK_COUNTER
+            if liveness_due and (status == "offline" or not status):
+                if global_stats:
+                    print_global_stats()
+                print(f"* Presence polls ({xbox_gamertag}): {user_state.get_poll_stats_str()}")
+                print_cur_ts("Liveness check, timestamp:\t")
+                alive_counter = 0
+                liveness_ts = time.monotonic()
 
-            # Detect gaming activity for "appear offline" users via title history
-            # This triggers when we detect a new game session started while user appears offline
-            if status == "offline" and title_history_ts > 0 and title_history_ts_old > 0 and title_history_ts > title_history_ts_old:
-                activity_detected_ts = get_date_from_ts(title_history_ts)
-                game_info = f" '{title_history_game}'" if title_history_game else ""
-                print(f"User detected playing a game{game_info} (via title history)! Started: {activity_detected_ts}")
+            await asyncio.sleep(get_check_interval(xbox_gamertag, status))
 
-                m_subject = f"Xbox user {xbox_gamertag} detected playing{game_info} (via title history)"
-                m_body = f"Xbox user {xbox_gamertag} appears offline but was detected starting a game{game_info}.\n\nGame session started: {activity_detected_ts}\n\nNote: This was detected via title history. We cannot detect when the user stops playing via this method.{get_cur_ts(nl_ch + nl_ch + 'Timestamp: ')}"
 
-                if ACTIVE_INACTIVE_NOTIFICATION or STATUS_NOTIFICATION:
-                    print(f"Sending email notification to {RECEIVER_EMAIL}")
-                    send_email(m_subject, m_body, "", SMTP_SSL)
+# Runs the monitoring of a single target in multi-user mode, so one failing user does not stop the others
+async def xbox_monitor_target(xbox_gamertag, csv_file_name, xbl_client, ready_event, presence_batcher, user_profile, achievements_count=5, games_count=10):
+    try:
+        await xbox_monitor_user(xbox_gamertag, csv_file_name, achievements_count=achievements_count, games_count=games_count, xbl_client=xbl_client, ready_event=ready_event, presence_batcher=presence_batcher, user_profile=user_profile, global_stats=False)
+    except SystemExit:
+        print(f"* Monitoring of Xbox user {xbox_gamertag} stopped")
+        print_cur_ts("Timestamp:\t\t\t")
+    except Exception as e:
+        print(f"* Error: Monitoring of Xbox user {xbox_gamertag} stopped: {e}")
+        print_cur_ts("Timestamp:\t\t\t")
+    finally:
+        ready_event.set()
 
-                print_cur_ts("Timestamp:\t\t\t")
-                title_history_ts_old = title_history_ts
-                change = True
 
-            if change:
-                alive_counter = 0
+# Prints process-wide stats every LIVENESS_CHECK_INTERVAL seconds in multi-user mode (once for all monitored users)
+async def xbox_print_global_stats_loop():
+    while True:
+        await asyncio.sleep(LIVENESS_CHECK_INTERVAL)
+        if print_global_stats():
+            print_cur_ts("Timestamp:\t\t\t")
 
-                try:
-                    if csv_file_name:
-                        write_csv_entry(csv_file_name, now_local_naive(), status, game_name)
-                except Exception as e:
-                    print(f"* Error: {e}")
 
-            status_old = status
-            game_name_old = game_name
+# Monitors activity of multiple Xbox users from a single process sharing one signed session & Xbox Live client
+async def xbox_monitor_users(xbox_gamertags, csv_file_names, achievements_count=5, games_count=10):
 
-            alive_counter += 1
+    async with SignedSession() as session:
 
-            if LIVENESS_CHECK_COUNTER and alive_counter >= LIVENESS_CHECK_COUNTER and (status == "offline" or not status):
-                print_cur_ts("Liveness check, timestamp:\t")
-                alive_counter = 0
+        auth_mgr = AuthenticationManager(session, MS_APP_CLIENT_ID, MS_APP_CLIENT_SECRET, "")
 
-            if status and status != "offline":
-                await asyncio.sleep(XBOX_ACTIVE_CHECK_INTERVAL)
-            else:
-                await asyncio.sleep(XBOX_CHECK_INTERVAL)
+        print_step("Authenticating with Xbox...")
+        await authenticate_and_refresh_tokens(auth_mgr)
+        print_ok()
+
+        xbl_client = XboxLiveClient(auth_mgr)
+        presence_batcher = XboxPresenceBatcher(xbl_client, PRESENCE_BATCH_WINDOW)
+
+        print_step(f"Resolving {len(xbox_gamertags)} gamer tags...")
+        user_profiles = await xbox_resolve_profiles(xbl_client, xbox_gamertags)
+        print_ok()
+        if len(user_profiles) < len(xbox_gamertags):
+            print(f"* Warning: Cannot resolve gamer tags: {', '.join(x for x in xbox_gamertags if x not in user_profiles)}")
+        print()
+
+        # Startup phases run one by one to keep their output readable, monitoring loops run concurrently
+        tasks = []
+        for xbox_gamertag in xbox_gamertags:
+            ready_event = asyncio.Event()
+            tasks.append(asyncio.create_task(xbox_monitor_target(xbox_gamertag, csv_file_names.get(xbox_gamertag, ""), xbl_client, ready_event, presence_batcher, user_profiles.get(xbox_gamertag), achievements_count, games_count)))
+            await ready_event.wait()
+
+        global_stats_task = asyncio.create_task(xbox_print_global_stats_loop()) if LIVENESS_CHECK_INTERVAL > 0 else None
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if global_stats_task:
+                global_stats_task.cancel()
+
+
+# Reads the list of Xbox gamer tags from the targets file (one per line, # starts a comment)
+def read_targets_file(file_name):
+    gamertags = []
+    with open(file_name, "r", encoding="utf-8") as f:
+        for line in f:
+            gamertag = line.split("#", 1)[0].strip()
+            if gamertag:
+                gamertags.append(gamertag)
+    return gamertags
+
+
+# Returns CSV file name for the given user in multi-user mode; eg. xbox.csv -> xbox_<gamer_tag>.csv
+def get_user_csv_file_name(csv_file_name, gamertag):
+    if not csv_file_name:
+        return ""
+    root, ext = os.path.splitext(csv_file_name)
+    return f"{root}_{gamertag}{ext or '.csv'}"
 
 
 def main():
-    global CLI_CONFIG_PATH, DOTENV_FILE, LOCAL_TIMEZONE, LIVENESS_CHECK_COUNTER, MS_APP_CLIENT_ID, MS_APP_CLIENT_SECRET, CSV_FILE, DISABLE_LOGGING, XBOX_LOGFILE, ACTIVE_INACTIVE_NOTIFICATION, GAME_CHANGE_NOTIFICATION, STATUS_NOTIFICATION, ERROR_NOTIFICATION, XBOX_CHECK_INTERVAL, XBOX_ACTIVE_CHECK_INTERVAL, SMTP_PASSWORD, stdout_bck, MS_AUTH_TOKENS_FILE, DEBUG_MODE
+    global CLI_CONFIG_PATH, DOTENV_FILE, LOCAL_TIMEZONE, LIVENESS_CHECK_COUNTER, MS_APP_CLIENT_ID, MS_APP_CLIENT_SECRET, CSV_FILE, XBOX_TARGETS_FILE, DISABLE_LOGGING, XBOX_LOGFILE, ACTIVE_INACTIVE_NOTIFICATION, GAME_CHANGE_NOTIFICATION, STATUS_NOTIFICATION, ERROR_NOTIFICATION, XBOX_CHECK_INTERVAL, XBOX_ACTIVE_CHECK_INTERVAL, TITLE_HISTORY_CHECK_INTERVAL, EMAIL_DIGEST_WINDOW, SMTP_PASSWORD, stdout_bck, MS_AUTH_TOKENS_FILE, DEBUG_MODE, ADAPTIVE_POLLING, poll_scheduler, SQLITE_DB_FILE, event_store, PRESENCE_FAST_PATH
 
     if "--generate-config" in sys.argv:
         config_content = CONFIG_BLOCK.strip("\n") + "\n"
@@ -2037,9 +3774,9 @@ def main():
     # Positional
     parser.add_argument(
         "xbox_gamertag",
-        nargs="?",
+        nargs="*",
         metavar="XBOX_GAMERTAG",
-        help="User's Xbox gamer tag",
+        help="User's Xbox gamer tag (specify several to monitor multiple users from one process)",
         type=str
     )
 
@@ -2120,6 +3857,13 @@ def main():
         default=None,
         help="Do not email on errors"
     )
+    notify.add_argument(
+        "--email-digest",
+        dest="email_digest",
+        metavar="SECONDS",
+        type=int,
+        help="Collect notifications over this window and send them as one digest email (0 = disabled)"
+    )
     notify.add_argument(
         "--send-test-email",
         dest="send_test_email",
@@ -2167,6 +3911,37 @@ def main():
         help="Limit number of recently played games to display (default: 10)"
     )
 
+    # History queries
+    query = parser.add_argument_group("History queries")
+    query.add_argument(
+        "--query",
+        dest="query",
+        choices=["summary", "games", "daily", "online"],
+        help="Query activity history from SQLite database (--db-file) or CSV file (-b) and exit: summary, games (time per game), daily (online hours per day) or online (users online in the range)"
+    )
+    query.add_argument(
+        "--since",
+        dest="since",
+        metavar="DATE",
+        type=str,
+        help="Start of the query range in local time, e.g. '2026-10-01' or '2026-10-01 20:00' (default: beginning)"
+    )
+    query.add_argument(
+        "--until",
+        dest="until",
+        metavar="DATE",
+        type=str,
+        help="End of the query range in local time (default: now)"
+    )
+    query.add_argument(
+        "--top",
+        dest="top_count",
+        metavar="NUMBER",
+        type=int,
+        default=10,
+        help="Number of top games in query summary (default: 10)"
+    )
+
     # Intervals & timers
     times = parser.add_argument_group("Intervals & timers")
     times.add_argument(
@@ -2183,8 +3958,36 @@ def main():
         type=int,
         help="Polling interval when user is online"
     )
+    times.add_argument(
+        "--fast-presence",
+        dest="fast_presence",
+        action="store_true",
+        default=None,
+        help="Fetch presence as raw JSON bypassing python-xbox model validation (lower CPU usage)"
+    )
+    times.add_argument(
+        "--adaptive-polling",
+        dest="adaptive_polling",
+        action="store_true",
+        default=None,
+        help="Adapt offline polling interval to user's activity patterns learned from CSV history"
+    )
+    times.add_argument(
+        "--title-history-interval",
+        dest="title_history_interval",
+        metavar="SECONDS",
+        type=int,
+        help="Title history check interval when user is offline (0 = every offline poll)"
+    )
 
     opts = parser.add_argument_group("Features & output")
+    opts.add_argument(
+        "--targets-file",
+        dest="targets_file",
+        metavar="PATH",
+        type=str,
+        help="File with Xbox gamer tags to monitor (one per line)"
+    )
     opts.add_argument(
         "-b", "--csv-file",
         dest="csv_file",
@@ -2192,6 +3995,20 @@ def main():
         type=str,
         help="Write status & game changes to CSV"
     )
+    opts.add_argument(
+        "--db-file",
+        dest="db_file",
+        metavar="DB_FILENAME",
+        type=str,
+        help="Store status & game changes of all monitored users in SQLite database"
+    )
+    opts.add_argument(
+        "--import-csv",
+        dest="import_csv",
+        metavar="CSV_FILENAME",
+        type=str,
+        help="Import existing CSV file of the user into SQLite database (--db-file) and exit"
+    )
     opts.add_argument(
         "-d", "--disable-logging",
         dest="disable_logging",
@@ -2280,6 +4097,19 @@ def main():
             print(f"* Error: Configured LOCAL_TIMEZONE '{LOCAL_TIMEZONE}' is not valid. Please use a valid pytz timezone name.")
             sys.exit(1)
 
+    try:
+        xbox_load_device_registry()
+    except (AttributeError, TypeError, ValueError) as e:
+        print(f"* Error: Invalid XBOX_DEVICE_TYPES, expected {{code name: (short name, long name)}}: {e}")
+        sys.exit(1)
+
+    if args.query:
+        if args.db_file:
+            SQLITE_DB_FILE = args.db_file
+        if args.csv_file:
+            CSV_FILE = args.csv_file
+        sys.exit(run_history_query(args.query, list(args.xbox_gamertag), args.since, args.until, args.top_count))
+
     if not check_internet():
         sys.exit(1)
 
@@ -2291,10 +4121,54 @@ def main():
             sys.exit(1)
         sys.exit(0)
 
-    if not args.xbox_gamertag:
+    if args.targets_file:
+        XBOX_TARGETS_FILE = args.targets_file
+
+    xbox_gamertags = list(args.xbox_gamertag)
+
+    if XBOX_TARGETS_FILE:
+        XBOX_TARGETS_FILE = os.path.expanduser(XBOX_TARGETS_FILE)
+        try:
+            xbox_gamertags.extend(read_targets_file(XBOX_TARGETS_FILE))
+        except Exception as e:
+            print(f"* Error: Cannot read targets file '{XBOX_TARGETS_FILE}': {e}")
+            sys.exit(1)
+
+    # Remove duplicates (gamer tags are case insensitive), keep the original order
+    unique_gamertags = {}
+    for gamertag in xbox_gamertags:
+        unique_gamertags.setdefault(gamertag.lower(), gamertag)
+    xbox_gamertags = list(unique_gamertags.values())
+
+    if not xbox_gamertags:
         print("* Error: XBOX_GAMERTAG needs to be defined !")
         sys.exit(1)
 
+    multi_user = len(xbox_gamertags) > 1
+
+    if args.db_file:
+        SQLITE_DB_FILE = args.db_file
+
+    if SQLITE_DB_FILE:
+        SQLITE_DB_FILE = os.path.expanduser(SQLITE_DB_FILE)
+
+    if args.import_csv:
+        if multi_user:
+            print("* Error: --import-csv supports only a single XBOX_GAMERTAG")
+            sys.exit(1)
+        if not SQLITE_DB_FILE:
+            print("* Error: --import-csv requires SQLite database file (SQLITE_DB_FILE / --db-file)")
+            sys.exit(1)
+        try:
+            store = EventStore(SQLITE_DB_FILE)
+            imported = store.import_csv(os.path.expanduser(args.import_csv), xbox_gamertags[0])
+            store.close()
+        except Exception as e:
+            print(f"* Error: Cannot import CSV file '{args.import_csv}': {e}")
+            sys.exit(1)
+        print(f"* Imported {imported} event(s) of user {xbox_gamertags[0]} from '{args.import_csv}' to '{SQLITE_DB_FILE}'")
+        sys.exit(0)
+
     if args.ms_app_client_id:
         MS_APP_CLIENT_ID = args.ms_app_client_id
 
@@ -2319,7 +4193,10 @@ def main():
         DEBUG_MODE = args.debug_mode
 
     if args.info_mode:
-        asyncio.run(get_user_info(args.xbox_gamertag, client=None, show_friends=args.show_friends, show_recent_achievements=args.show_recent_achievements, show_recent_games=True, achievements_count=args.achievements_count, games_count=args.games_count))
+        if multi_user:
+            print("* Error: -i / --info mode supports only a single XBOX_GAMERTAG")
+            sys.exit(1)
+        asyncio.run(get_user_info(xbox_gamertags[0], client=None, show_friends=args.show_friends, show_recent_achievements=args.show_recent_achievements, show_recent_games=True, achievements_count=args.achievements_count, games_count=args.games_count))
         sys.exit(0)
 
     if args.check_interval:
@@ -2329,19 +4206,44 @@ def main():
     if args.active_interval:
         XBOX_ACTIVE_CHECK_INTERVAL = args.active_interval
 
+    if args.adaptive_polling is True:
+        ADAPTIVE_POLLING = True
+
+    if args.fast_presence is True:
+        PRESENCE_FAST_PATH = True
+
+    if args.title_history_interval is not None:
+        TITLE_HISTORY_CHECK_INTERVAL = args.title_history_interval
+
+    if SQLITE_DB_FILE:
+        try:
+            event_store = EventStore(SQLITE_DB_FILE, SQLITE_BATCH_SIZE, SQLITE_COMMIT_INTERVAL)
+        except Exception as e:
+            print(f"* Error: SQLite database '{SQLITE_DB_FILE}' cannot be opened: {e}")
+            sys.exit(1)
+
+    if ADAPTIVE_POLLING:
+        poll_scheduler = AdaptivePollScheduler(ADAPTIVE_MIN_CHECK_INTERVAL, ADAPTIVE_MAX_CHECK_INTERVAL, ADAPTIVE_REQUEST_BUDGET)
+
     if args.csv_file:
         CSV_FILE = os.path.expanduser(args.csv_file)
     else:
         if CSV_FILE:
             CSV_FILE = os.path.expanduser(CSV_FILE)
 
+    if multi_user:
+        csv_file_names = {gamertag: get_user_csv_file_name(CSV_FILE, gamertag) for gamertag in xbox_gamertags}
+    else:
+        csv_file_names = {xbox_gamertags[0]: CSV_FILE}
+
     if CSV_FILE:
-        try:
-            with open(CSV_FILE, 'a', newline='', buffering=1, encoding="utf-8") as _:
-                pass
-        except Exception as e:
-            print(f"* Error: CSV file cannot be opened for writing: {e}")
-            sys.exit(1)
+        for csv_file_name in csv_file_names.values():
+            try:
+                with open(csv_file_name, 'a', newline='', buffering=1, encoding="utf-8") as _:
+                    pass
+            except Exception as e:
+                print(f"* Error: CSV file cannot be opened for writing: {e}")
+                sys.exit(1)
 
     if args.disable_logging is True:
         DISABLE_LOGGING = True
@@ -2349,13 +4251,14 @@ def main():
         DEBUG_MODE = args.debug_mode
 
     if not DISABLE_LOGGING:
+        log_name_suffix = "multi" if multi_user else xbox_gamertags[0]
         log_path = Path(os.path.expanduser(XBOX_LOGFILE))
         if log_path.parent != Path('.'):
             if log_path.suffix == "":
-                log_path = log_path.parent / f"{log_path.name}_{args.xbox_gamertag}.log"
+                log_path = log_path.parent / f"{log_path.name}_{log_name_suffix}.log"
         else:
             if log_path.suffix == "":
-                log_path = Path(f"{log_path.name}_{args.xbox_gamertag}.log")
+                log_path = Path(f"{log_path.name}_{log_name_suffix}.log")
         log_path.parent.mkdir(parents=True, exist_ok=True)
         FINAL_LOG_PATH = str(log_path)
         sys.stdout = Logger(FINAL_LOG_PATH)
@@ -2374,6 +4277,9 @@ def main():
     if args.notify_errors is False:
         ERROR_NOTIFICATION = False
 
+    if args.email_digest is not None:
+        EMAIL_DIGEST_WINDOW = args.email_digest
+
     if SMTP_HOST.startswith("your_smtp_server_"):
         ACTIVE_INACTIVE_NOTIFICATION = False
         GAME_CHANGE_NOTIFICATION = False
@@ -2381,19 +4287,35 @@ def main():
         ERROR_NOTIFICATION = False
 
     print(f"* Xbox polling intervals:\t[offline: {display_time(XBOX_CHECK_INTERVAL)}] [online: {display_time(XBOX_ACTIVE_CHECK_INTERVAL)}]")
+    print("* Title history checks:\t\t" + (f"every {display_time(TITLE_HISTORY_CHECK_INTERVAL)} when offline" if TITLE_HISTORY_CHECK_INTERVAL > 0 else "every offline poll"))
+    if ADAPTIVE_POLLING:
+        print(f"* Adaptive polling:\t\t[offline: {display_time(ADAPTIVE_MIN_CHECK_INTERVAL)} - {display_time(ADAPTIVE_MAX_CHECK_INTERVAL)}]" + (f" [budget: {ADAPTIVE_REQUEST_BUDGET} checks/hour]" if ADAPTIVE_REQUEST_BUDGET else ""))
+    if PRESENCE_FAST_PATH:
+        print(f"* Presence fast path:\t\tTrue (JSON parser: {'orjson' if orjson else 'json'})")
     print(f"* Email notifications:\t\t[online/offline status changes = {ACTIVE_INACTIVE_NOTIFICATION}] [game changes = {GAME_CHANGE_NOTIFICATION}]\n*\t\t\t\t[all status changes = {STATUS_NOTIFICATION}] [errors = {ERROR_NOTIFICATION}]")
+    if EMAIL_DIGEST_WINDOW > 0:
+        print(f"* Email digest window:\t\t{display_time(EMAIL_DIGEST_WINDOW)}")
     print(f"* Liveness check:\t\t{bool(LIVENESS_CHECK_INTERVAL)}" + (f" ({display_time(LIVENESS_CHECK_INTERVAL)})" if LIVENESS_CHECK_INTERVAL else ""))
-    print(f"* CSV logging enabled:\t\t{bool(CSV_FILE)}" + (f" ({CSV_FILE})" if CSV_FILE else ""))
+    print(f"* CSV logging enabled:\t\t{bool(CSV_FILE)}" + (f" ({CSV_FILE})" if CSV_FILE else "") + (" (per user)" if CSV_FILE and multi_user else ""))
+    print(f"* SQLite event store:\t\t{bool(SQLITE_DB_FILE)}" + (f" ({SQLITE_DB_FILE})" if SQLITE_DB_FILE else ""))
     print(f"* Output logging enabled:\t{not DISABLE_LOGGING}" + (f" ({FINAL_LOG_PATH})" if not DISABLE_LOGGING else ""))
+    if not DISABLE_LOGGING and (LOG_ROTATE_MAX_SIZE > 0 or LOG_ROTATE_DAILY):
+        print("* Log rotation:\t\t\t" + (f"[size: {LOG_ROTATE_MAX_SIZE} bytes] " if LOG_ROTATE_MAX_SIZE > 0 else "") + ("[daily] " if LOG_ROTATE_DAILY else "") + f"[keep: {LOG_ROTATE_KEEP or 'all'}]")
     print(f"* Xbox token cache file:\t{MS_AUTH_TOKENS_FILE or 'None'}")
+    print(f"* XUID cache file:\t\t{get_xuid_cache().file_name if get_xuid_cache() else 'None'}" + (f" (TTL: {display_time(XUID_CACHE_TTL)})" if XUID_CACHE_FILE else ""))
     print(f"* Configuration file:\t\t{cfg_path}")
     print(f"* Dotenv file:\t\t\t{env_path or 'None'}")
     print(f"* Debug mode:\t\t\t{DEBUG_MODE}")
     print(f"* Local timezone:\t\t{LOCAL_TIMEZONE}")
 
-    out = f"\nMonitoring user with Xbox gamer tag {args.xbox_gamertag}"
-    print(out)
-    print("─" * len(out))
+    if multi_user:
+        out = f"\nMonitoring {len(xbox_gamertags)} users with Xbox gamer tags: {', '.join(xbox_gamertags)}"
+        print(out)
+        print("─" * min(len(out), HORIZONTAL_LINE))
+    else:
+        out = f"\nMonitoring user with Xbox gamer tag {xbox_gamertags[0]}"
+        print(out)
+        print("─" * len(out))
 
     # We define signal handlers only for Linux, Unix & MacOS since Windows has limited number of signals supported
     if platform.system() != 'Windows':
@@ -2404,8 +4326,13 @@ def main():
         signal.signal(signal.SIGABRT, decrease_active_check_signal_handler)
         signal.signal(signal.SIGHUP, reload_secrets_signal_handler)
 
-    asyncio.run(xbox_monitor_user(args.xbox_gamertag, CSV_FILE, achievements_count=args.achievements_count, games_count=args.games_count))
+    if multi_user:
+        asyncio.run(run_with_email_queue(xbox_monitor_users(xbox_gamertags, csv_file_names, achievements_count=args.achievements_count, games_count=args.games_count)))
+    else:
+        asyncio.run(run_with_email_queue(xbox_monitor_user(xbox_gamertags[0], CSV_FILE, achievements_count=args.achievements_count, games_count=args.games_count)))
 
+    if isinstance(sys.stdout, Logger):
+        sys.stdout.close()
     sys.stdout = stdout_bck
     sys.exit(0)
 